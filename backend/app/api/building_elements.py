@@ -1,10 +1,13 @@
+import json
+from typing import Optional
+
 from app.models.building_element_model import BuildingElement, BuildingElementUpload
 from app.schemas.building_element_schema import (
+    BuildingElementBase,
+    BuildingElementCreate,
     BuildingElementFilterOptions,
-    BuildingElementRead,
     BuildingElementSearchRequest,
     BuildingElementUploadCreate,
-    BuildingElementUploadRead,
 )
 from app.schemas.search_schema import SearchResponse
 from app.types import (
@@ -17,13 +20,130 @@ from app.types import (
     ReusePotentialType,
     WasteCodeType,
 )
-from app.utils.database import get_session, read_type_by_value_or_throw, read_types
-from fastapi import APIRouter, Depends, HTTPException, status
+from app.utils.database import (
+    cached_types_response,
+    delete_row_by_id,
+    get_async_session,
+    get_session,
+    read_type_id_by_value,
+    read_types,
+    truncate_tables,
+    type_not_found_message,
+    unified_type_registry,
+)
+from app.utils.search import SearchSpec, TypeColumn, run_search, search_response
+from app.utils.spreadsheets import (
+    iter_csv_building_elements,
+    iter_workbook_building_elements,
+    open_workbook,
+    read_workbook_location,
+)
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    UploadFile,
+    status,
+)
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlmodel import select
 
 router = APIRouter()
 
+UPLOAD_CHUNK_SIZE = 1000
+
+
+# maps each type label field of BuildingElementCreate to its foreign key column and type class
+BUILDING_ELEMENT_TYPE_FIELDS = {
+    "worksheet_type": ("worksheet_type_id", BuildingElementWorksheetType),
+    "unit_type": ("unit_type_id", BuildingElementUnitType),
+    "material_type": ("material_type_id", MaterialType),
+    "health_status_type": ("health_status_type_id", HealthStatusType),
+    "reuse_potential_type": ("reuse_potential_type_id", ReusePotentialType),
+    "waste_code_type": ("waste_code_type_id", WasteCodeType),
+    "recycling_potential_type": ("recycling_potential_type_id", RecyclingPotentialType),
+    "circular_service_needed": ("circular_service_needed_id", CircularServiceType),
+}
+
+
+# (field, whether the column is a type id) of the search results, in the order of BuildingElementBase
+BUILDING_ELEMENT_RESULT_FIELDS = [
+    (field, field in BUILDING_ELEMENT_TYPE_FIELDS) for field in BuildingElementBase.__fields__
+]
+
+# a single join ordered by upload such that every upload is fetched once together with its elements,
+# pages are cut per element such that an upload can continue on the next page.
+# only the result columns are selected as plain tuples, no ORM instances are built
+BUILDING_ELEMENT_SEARCH_SPEC = SearchSpec(
+    query=select(
+        BuildingElement.building_element_upload_id,
+        BuildingElement.id,
+        BuildingElementUpload.address,
+        BuildingElementUpload.latitude,
+        BuildingElementUpload.longitude,
+        *(
+            getattr(BuildingElement, BUILDING_ELEMENT_TYPE_FIELDS[field][0] if is_type else field)
+            for field, is_type in BUILDING_ELEMENT_RESULT_FIELDS
+        ),
+    )
+    .select_from(BuildingElementUpload)
+    .join(BuildingElement, BuildingElement.building_element_upload_id == BuildingElementUpload.id),
+    key_column=BuildingElement.id,
+    sort_columns=[BuildingElement.building_element_upload_id, BuildingElement.id],
+    sort_key=lambda row: (row.building_element_upload_id, row.id),
+    text_column=BuildingElement.title,
+    type_fields={
+        "worksheet_type_ids": TypeColumn("worksheet_types", BuildingElement.worksheet_type_id),
+        "unit_type_ids": TypeColumn("unit_types", BuildingElement.unit_type_id),
+        "material_type_ids": TypeColumn("material_types", BuildingElement.material_type_id),
+        "health_status_type_ids": TypeColumn("health_status_types", BuildingElement.health_status_type_id),
+        "reuse_potential_type_ids": TypeColumn("reuse_potential_types", BuildingElement.reuse_potential_type_id),
+        "waste_code_type_ids": TypeColumn("waste_code_types", BuildingElement.waste_code_type_id),
+        "recycling_potential_type_ids": TypeColumn(
+            "recycling_potential_types", BuildingElement.recycling_potential_type_id
+        ),
+        "circular_service_needed_type_ids": TypeColumn(
+            "circular_service_needed_types", BuildingElement.circular_service_needed_id
+        ),
+    },
+    range_fields={
+        "total_mass_kg": BuildingElement.total_mass_kg,
+        "total_volume_m3": BuildingElement.total_volume_m3,
+    },
+    location_columns=(BuildingElementUpload.latitude, BuildingElementUpload.longitude),
+)
+
+
+def to_building_element_row(session, building_element_create):
+    """
+    Converts a BuildingElementCreate into a building_element column mapping, resolving type labels to ids.
+    Returns the row (without building_element_upload_id) and a list of error messages.
+    """
+    row = building_element_create.dict(exclude_unset=False, exclude=set(BUILDING_ELEMENT_TYPE_FIELDS))
+    errors = []
+    for field, (column_name, type_class) in BUILDING_ELEMENT_TYPE_FIELDS.items():
+        value = getattr(building_element_create, field)
+        type_id = read_type_id_by_value(session, type_class, value)
+        if value and type_id is None:
+            errors.append(type_not_found_message(type_class, value))
+        row[column_name] = type_id
+    return row, errors
+
+
+def insert_building_elements(session, building_element_upload_id, rows):
+    # executemany with a single statement, batched into multi-row INSERTs by the psycopg2 dialect
+    session.execute(
+        insert(BuildingElement.__table__),
+        [{**row, "building_element_upload_id": building_element_upload_id} for row in rows],
+    )
+
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 def create_building_element_upload(
@@ -37,128 +157,206 @@ def create_building_element_upload(
     if not payload.building_elements:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No building elements found in payload")
 
+    # validate all rows before writing anything such that a bad row never leaves an orphaned upload behind
+    rows = []
+    errors = []
+    for index, building_element_create in enumerate(payload.building_elements):
+        row, row_errors = to_building_element_row(session, building_element_create)
+        rows.append(row)
+        errors.extend(f"building element <{index}>: {error}" for error in row_errors)
+    if errors:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=errors)
+
     building_element_upload = BuildingElementUpload(**payload.dict(exclude_unset=True, exclude={"building_elements"}))
     session.add(building_element_upload)
+    session.flush()
+    insert_building_elements(session, building_element_upload.id, rows)
     session.commit()
 
-    building_elements = (
-        BuildingElement(
-            **building_element_create.dict(
-                exclude_unset=True,
-                exclude={
-                    "building_element_upload_id",
-                    "worksheet_type",
-                    "unit_type",
-                    "material_type",
-                    "health_status_type",
-                    "reuse_potential_type",
-                    "waste_code_type",
-                    "recycling_potential_type",
-                    "circular_service_needed",
-                },
-            ),
-            building_element_upload_id=building_element_upload.id,
-            worksheet_type=read_type_by_value_or_throw(
-                session, BuildingElementWorksheetType, building_element_create.worksheet_type
-            ),
-            unit_type=read_type_by_value_or_throw(session, BuildingElementUnitType, building_element_create.unit_type),
-            material_type=read_type_by_value_or_throw(session, MaterialType, building_element_create.material_type),
-            health_status_type=read_type_by_value_or_throw(
-                session, HealthStatusType, building_element_create.health_status_type
-            ),
-            reuse_potential_type=read_type_by_value_or_throw(
-                session, ReusePotentialType, building_element_create.reuse_potential_type
-            ),
-            waste_code_type=read_type_by_value_or_throw(
-                session, WasteCodeType, building_element_create.waste_code_type
-            ),
-            recycling_potential_type=read_type_by_value_or_throw(
-                session, RecyclingPotentialType, building_element_create.recycling_potential_type
-            ),
-            circular_service_needed_type=read_type_by_value_or_throw(
-                session, CircularServiceType, building_element_create.circular_service_needed
-            ),
+
+def _ndjson(event):
+    return json.dumps(event) + "\n"
+
+
+@router.post("/upload/", status_code=status.HTTP_201_CREATED)
+def upload_building_element_file(
+    file: UploadFile = File(...),
+    address: Optional[str] = Form(None),
+    latitude: Optional[float] = Form(None),
+    longitude: Optional[float] = Form(None),
+    session: Session = Depends(get_session),
+):
+    filename = (file.filename or "").lower()
+    if filename.endswith(".xlsx"):
+        workbook = open_workbook(file.file)
+        location = read_workbook_location(workbook)
+        rows = iter_workbook_building_elements(workbook)
+    elif filename.endswith(".csv"):
+        location = None
+        rows = iter_csv_building_elements(file.file)
+    else:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only .xlsx and .csv files are supported")
+
+    if address is None or latitude is None or longitude is None:
+        if not location:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No address, latitude and longitude found in form data or in the workbook summary sheet",
+            )
+        address = address if address is not None else location[0]
+        latitude = latitude if latitude is not None else location[1]
+        longitude = longitude if longitude is not None else location[2]
+
+    def validate():
+        for location, data in rows:
+            try:
+                row, errors = to_building_element_row(session, BuildingElementCreate(**data))
+            except ValidationError as e:
+                row = None
+                errors = [f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()]
+            yield location, row, errors
+
+    # the rows are read up to the first valid one before responding, a file without any valid row is rejected instead
+    # of streaming a 201 without an upload
+    validated = validate()
+    leading_errors = []
+    for location, row, errors in validated:
+        if not errors:
+            first_row = row
+            break
+        leading_errors.append((location, errors))
+    else:
+        if not leading_errors:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No building elements found in file")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=[f"{location}: {error}" for location, errors in leading_errors for error in errors],
         )
-        for building_element_create in payload.building_elements
-    )
-    session.add_all(building_elements)
+
+    def ingest():
+        # rows are committed in chunks of UPLOAD_CHUNK_SIZE such that memory does not grow with the file size
+        building_element_upload = BuildingElementUpload(address=address, latitude=latitude, longitude=longitude)
+        session.add(building_element_upload)
+        session.flush()
+        building_element_upload_id = building_element_upload.id
+        processed = len(leading_errors) + 1
+        inserted = 0
+        failed = len(leading_errors)
+        chunk = [first_row]
+
+        def flush():
+            nonlocal inserted
+            insert_building_elements(session, building_element_upload_id, chunk)
+            session.commit()
+            inserted += len(chunk)
+            chunk.clear()
+
+        for location, errors in leading_errors:
+            yield _ndjson({"event": "error", "location": location, "errors": errors})
+
+        for location, row, errors in validated:
+            processed += 1
+            if errors:
+                failed += 1
+                yield _ndjson({"event": "error", "location": location, "errors": errors})
+                continue
+
+            chunk.append(row)
+            if len(chunk) >= UPLOAD_CHUNK_SIZE:
+                flush()
+                yield _ndjson({"event": "progress", "processed": processed, "inserted": inserted, "failed": failed})
+
+        if chunk:
+            flush()
+        yield _ndjson(
+            {
+                "event": "done",
+                "building_element_upload_id": building_element_upload_id,
+                "processed": processed,
+                "inserted": inserted,
+                "failed": failed,
+            }
+        )
+
+    return StreamingResponse(ingest(), status_code=status.HTTP_201_CREATED, media_type="application/x-ndjson")
+
+
+@router.delete("/{id}")
+def delete_building_element_upload(id: int, session: Session = Depends(get_session)):
+    building_element_upload = delete_row_by_id(session, BuildingElementUpload, id)
+    if not building_element_upload:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Building element upload not found")
     session.commit()
+    return building_element_upload
 
 
 @router.delete("/")
-def delete_all_building_element_uploads(session: Session = Depends(get_session)):
-    session.query(BuildingElement).delete()
-    session.query(BuildingElementUpload).delete()
+def delete_all_building_element_uploads(reset: bool = False, session: Session = Depends(get_session)):
+    # building elements are deleted together with their uploads, reset truncates the tables and restarts the ids
+    if reset:
+        truncate_tables(session, BuildingElementUpload)
+    else:
+        session.execute(delete(BuildingElementUpload))
     session.commit()
     return {"message": "All building element uploads deleted"}
 
 
 @router.get("/filter/", response_model=BuildingElementFilterOptions)
-def read_filter_options(session: Session = Depends(get_session)):
-    worksheet_types = read_types(session, BuildingElementWorksheetType)
-    unit_types = read_types(session, BuildingElementUnitType)
-    material_types = read_types(session, MaterialType)
-    health_status_types = read_types(session, HealthStatusType)
-    reuse_potential_types = read_types(session, ReusePotentialType)
-    waste_code_types = read_types(session, WasteCodeType)
-    recycling_potential_types = read_types(session, RecyclingPotentialType)
-    circular_service_needed_types = read_types(session, CircularServiceType)
-
-    return BuildingElementFilterOptions(
-        worksheet_types=worksheet_types,
-        unit_types=unit_types,
-        material_types=material_types,
-        health_status_types=health_status_types,
-        reuse_potential_types=reuse_potential_types,
-        waste_code_types=waste_code_types,
-        recycling_potential_types=recycling_potential_types,
-        circular_service_needed_types=circular_service_needed_types,
-    )
+async def read_filter_options(request: Request, session: AsyncSession = Depends(get_async_session)):
+    return await session.run_sync(filter_options_response, request)
+
+
+def filter_options_response(session, request):
+    def build():
+        worksheet_types = read_types(session, BuildingElementWorksheetType)
+        unit_types = read_types(session, BuildingElementUnitType)
+        material_types = read_types(session, MaterialType)
+        health_status_types = read_types(session, HealthStatusType)
+        reuse_potential_types = read_types(session, ReusePotentialType)
+        waste_code_types = read_types(session, WasteCodeType)
+        recycling_potential_types = read_types(session, RecyclingPotentialType)
+        circular_service_needed_types = read_types(session, CircularServiceType)
+
+        return BuildingElementFilterOptions(
+            worksheet_types=worksheet_types,
+            unit_types=unit_types,
+            material_types=material_types,
+            health_status_types=health_status_types,
+            reuse_potential_types=reuse_potential_types,
+            waste_code_types=waste_code_types,
+            recycling_potential_types=recycling_potential_types,
+            circular_service_needed_types=circular_service_needed_types,
+        )
+
+    return cached_types_response(request, session, "building_elements", build)
 
 
 @router.post("/search/", response_model=SearchResponse)
-def search_building_elements(request: BuildingElementSearchRequest, session: Session = Depends(get_session)):
-    search_text = request.query.text if request.query.text else None
-
-    filter_criteria = {
-        "worksheet_type_id": request.filter.worksheet_type_ids,
-        "unit_type_id": request.filter.unit_type_ids,
-        "material_type_id": request.filter.material_type_ids,
-        "health_status_type_id": request.filter.health_status_type_ids,
-        "reuse_potential_type_id": request.filter.reuse_potential_type_ids,
-        "waste_code_type_id": request.filter.waste_code_type_ids,
-        "recycling_potential_type_id": request.filter.recycling_potential_type_ids,
-        "circular_service_needed_id": request.filter.circular_service_needed_type_ids,
-    }
-
-    query = select(BuildingElement)
-
-    if search_text:
-        query = query.filter(BuildingElement.title.ilike(f"%{search_text}%"))
-
-    for attribute, ids in filter_criteria.items():
-        if ids:
-            query = query.filter(getattr(BuildingElement, attribute).in_(ids))
-
-    building_elements = session.execute(query).scalars().all()
-
-    upload_ids = [element.building_element_upload_id for element in building_elements]
-    upload_query = select(BuildingElementUpload).where(BuildingElementUpload.id.in_(upload_ids))
-    building_element_uploads = session.execute(upload_query).scalars().all()
-
-    building_element_upload_data = [
-        BuildingElementUploadRead(
-            id=upload.id,
-            address=upload.address,
-            latitude=upload.latitude,
-            longitude=upload.longitude,
-            building_elements=[
-                BuildingElementRead.from_building_element(element)
-                for element in building_elements
-                if element.building_element_upload_id == upload.id
-            ],
+async def search(request: BuildingElementSearchRequest, session: AsyncSession = Depends(get_async_session)):
+    return ORJSONResponse(await session.run_sync(search_building_elements, request))
+
+
+def search_building_elements(session, request):
+    rows, next_cursor, total, facets = run_search(session, BUILDING_ELEMENT_SEARCH_SPEC, request)
+    type_labels = unified_type_registry.get_labels(session)
+
+    # same shape as BuildingElementUploadRead, the rows are read from the database and not validated again
+    uploads = {}
+    for building_element_upload_id, _, address, latitude, longitude, *values in rows:
+        upload = uploads.get(building_element_upload_id)
+        if upload is None:
+            upload = uploads[building_element_upload_id] = {
+                "address": address,
+                "latitude": latitude,
+                "longitude": longitude,
+                "id": building_element_upload_id,
+                "building_elements": [],
+            }
+        upload["building_elements"].append(
+            {
+                field: type_labels.get(value) if is_type else value
+                for (field, is_type), value in zip(BUILDING_ELEMENT_RESULT_FIELDS, values)
+            }
         )
-        for upload in building_element_uploads
-    ]
 
-    return SearchResponse[BuildingElement](results=building_element_upload_data)
+    return search_response(list(uploads.values()), next_cursor, total, facets)
@@ -7,12 +7,12 @@ from app.models.collector_model import (
     CollectorToMaterialType,
     CollectorToWasteCodeType,
 )
-from app.models.unified_type_model import UnifiedType
 from app.schemas.collector_schema import (
+    CollectorBase,
     CollectorCreate,
     CollectorFilterOptions,
-    CollectorRead,
     CollectorSearchRequest,
+    CollectorUpdate,
 )
 from app.schemas.search_schema import SearchResponse
 from app.types import (
@@ -21,12 +21,64 @@ from app.types import (
     MaterialType,
     WasteCodeType,
 )
-from app.utils.database import get_session, read_types, read_types_by_values_or_throw
-from fastapi import APIRouter, Depends, HTTPException, status
+from app.utils.database import (
+    cached_types_response,
+    create_partners,
+    delete_row_by_id,
+    get_async_session,
+    get_session,
+    read_linked_type_labels,
+    read_types,
+    truncate_tables,
+    update_partner,
+)
+from app.utils.search import (
+    SearchSpec,
+    TypeLink,
+    partner_results,
+    run_search,
+    search_response,
+)
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlmodel import select
 
 router = APIRouter()
 
+# type collections of the create and update schemas with their link model and type class
+COLLECTOR_TYPE_LINKS = {
+    "material_types": (CollectorToMaterialType, MaterialType),
+    "waste_code_types": (CollectorToWasteCodeType, WasteCodeType),
+    "authorized_vehicle_types": (CollectorToAuthorizedVehicleType, AuthorizedVehicleType),
+    "circular_strategy_types": (CollectorToCircularStrategyType, CircularStrategyType),
+}
+
+# the columns of the search results, the type collections are read from the link tables
+COLLECTOR_RESULT_FIELDS = [field for field in CollectorBase.__fields__ if field in Collector.__table__.c]
+
+COLLECTOR_SEARCH_SPEC = SearchSpec(
+    # only the result columns are selected as plain tuples, no ORM instances are built
+    query=select(*(getattr(Collector, field) for field in COLLECTOR_RESULT_FIELDS), Collector.id),
+    key_column=Collector.id,
+    sort_columns=[Collector.name, Collector.id],
+    sort_key=lambda row: (row.name, row.id),
+    text_column=Collector.name,
+    type_fields={
+        "material_type_ids": TypeLink("material_types", CollectorToMaterialType, "collector_id"),
+        "waste_code_type_ids": TypeLink("waste_code_types", CollectorToWasteCodeType, "collector_id"),
+        "authorized_vehicle_type_ids": TypeLink(
+            "authorized_vehicle_types", CollectorToAuthorizedVehicleType, "collector_id"
+        ),
+        "circular_strategy_type_ids": TypeLink(
+            "circular_strategy_types", CollectorToCircularStrategyType, "collector_id"
+        ),
+    },
+    location_columns=(Collector.latitude, Collector.longitude),
+)
+
 
 @router.post("/")
 def create_collectors(
@@ -36,33 +88,10 @@ def create_collectors(
     if not payload:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No collectors found in payload")
 
-    collectors_to_create = []
-    for collector_create in payload:
-        material_types = read_types_by_values_or_throw(session, MaterialType, collector_create.material_types)
-        waste_code_types = read_types_by_values_or_throw(session, WasteCodeType, collector_create.waste_code_types)
-        authorized_vehicle_types = read_types_by_values_or_throw(
-            session, AuthorizedVehicleType, collector_create.authorized_vehicle_types
-        )
-        circular_strategy_types = read_types_by_values_or_throw(
-            session, CircularStrategyType, collector_create.circular_strategy_types
-        )
-
-        collector = Collector(
-            **collector_create.dict(
-                exclude_unset=True,
-                exclude={"material_types", "waste_code_types", "authorized_vehicle_types", "circular_strategy_types"},
-            ),
-            material_types=material_types,
-            waste_code_types=waste_code_types,
-            authorized_vehicle_types=authorized_vehicle_types,
-            circular_strategy_types=circular_strategy_types,
-        )
-        collectors_to_create.append(collector)
-
-    session.add_all(collectors_to_create)
+    collectors = create_partners(session, Collector, "collector_id", COLLECTOR_TYPE_LINKS, payload)
     session.commit()
 
-    return [collector.dict() for collector in collectors_to_create]
+    return collectors
 
 
 @router.put("/{id}")
@@ -71,35 +100,27 @@ def update_collector(
     payload: CollectorCreate,
     session: Session = Depends(get_session),
 ):
-    collector = session.get(Collector, id)
+    collector = update_partner(session, Collector, "collector_id", COLLECTOR_TYPE_LINKS, id, payload.dict())
     if not collector:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collector not found")
-    material_types = read_types_by_values_or_throw(session, MaterialType, payload.material_types)
-    waste_code_types = read_types_by_values_or_throw(session, WasteCodeType, payload.waste_code_types)
-    authorized_vehicle_types = read_types_by_values_or_throw(
-        session, AuthorizedVehicleType, payload.authorized_vehicle_types
-    )
-    circular_strategy_types = read_types_by_values_or_throw(
-        session, CircularStrategyType, payload.circular_strategy_types
-    )
-
-    collector.name = payload.name
-    collector.address = payload.address
-    collector.zip_code = payload.zip_code
-    collector.city = payload.city
-    collector.latitude = payload.latitude
-    collector.longitude = payload.longitude
-    collector.email = payload.email
-    collector.phone = payload.phone
-    collector.material_types = material_types
-    collector.waste_code_types = waste_code_types
-    collector.authorized_vehicle_types = authorized_vehicle_types
-    collector.circular_strategy_types = circular_strategy_types
-
-    session.add(collector)
     session.commit()
+    return collector
 
-    return collector.dict()
+
+@router.patch("/{id}")
+def patch_collector(
+    id: int,
+    payload: CollectorUpdate,
+    session: Session = Depends(get_session),
+):
+    # only the submitted fields are updated, the row is not written if they equal the stored state
+    collector = update_partner(
+        session, Collector, "collector_id", COLLECTOR_TYPE_LINKS, id, payload.dict(exclude_unset=True)
+    )
+    if not collector:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collector not found")
+    session.commit()
+    return collector
 
 
 @router.delete("/{id}")
@@ -107,65 +128,56 @@ def delete_collector(
     id: int,
     session: Session = Depends(get_session),
 ):
-    collector = session.get(Collector, id)
+    collector = delete_row_by_id(session, Collector, id)
     if not collector:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collector not found")
-    session.delete(collector)
     session.commit()
-    return collector.dict()
+    return collector
 
 
 @router.delete("/")
 def delete_all_collectors(
+    reset: bool = False,
     session: Session = Depends(get_session),
 ):
-    session.query(CollectorToMaterialType).delete()
-    session.query(CollectorToWasteCodeType).delete()
-    session.query(CollectorToAuthorizedVehicleType).delete()
-    session.query(CollectorToCircularStrategyType).delete()
-    session.query(Collector).delete()
+    # reset truncates the tables and restarts the ids, e.g. before reseeding a staging database
+    if reset:
+        truncate_tables(session, Collector)
+    else:
+        session.execute(delete(Collector))
     session.commit()
     return {"message": "All collectors deleted"}
 
 
 @router.get("/filter/", response_model=CollectorFilterOptions)
-def read_filter_options(session: Session = Depends(get_session)):
-    material_types = read_types(session, MaterialType)
-    waste_code_types = read_types(session, WasteCodeType)
-    authorized_vehicle_types = read_types(session, AuthorizedVehicleType)
-    circular_strategy_types = read_types(session, CircularStrategyType)
-    return CollectorFilterOptions(
-        material_types=material_types,
-        waste_code_types=waste_code_types,
-        authorized_vehicle_types=authorized_vehicle_types,
-        circular_strategy_types=circular_strategy_types,
-    )
+async def read_filter_options(request: Request, session: AsyncSession = Depends(get_async_session)):
+    return await session.run_sync(filter_options_response, request)
+
+
+def filter_options_response(session, request):
+    def build():
+        material_types = read_types(session, MaterialType)
+        waste_code_types = read_types(session, WasteCodeType)
+        authorized_vehicle_types = read_types(session, AuthorizedVehicleType)
+        circular_strategy_types = read_types(session, CircularStrategyType)
+        return CollectorFilterOptions(
+            material_types=material_types,
+            waste_code_types=waste_code_types,
+            authorized_vehicle_types=authorized_vehicle_types,
+            circular_strategy_types=circular_strategy_types,
+        )
+
+    return cached_types_response(request, session, "collectors", build)
 
 
 @router.post("/search", response_model=SearchResponse)
-def search(payload: CollectorSearchRequest, session: Session = Depends(get_session)):
-    text = payload.query.text if payload.query.text else None
-    material_type_ids = payload.filter.material_type_ids
-    waste_code_type_ids = payload.filter.waste_code_type_ids
-    authorized_vehicle_type_ids = payload.filter.authorized_vehicle_type_ids
-    circular_strategy_type_ids = payload.filter.circular_strategy_type_ids
-
-    query = session.query(Collector)
-
-    if text:
-        query = query.where(Collector.name.ilike(f"%{text}%"))
-
-    if material_type_ids:
-        query = query.where(Collector.material_types.any(UnifiedType.id.in_(material_type_ids)))
-    if waste_code_type_ids:
-        query = query.where(Collector.waste_code_types.any(UnifiedType.id.in_(waste_code_type_ids)))
-    if authorized_vehicle_type_ids:
-        query = query.where(Collector.authorized_vehicle_types.any(UnifiedType.id.in_(authorized_vehicle_type_ids)))
-    if circular_strategy_type_ids:
-        query = query.where(Collector.circular_strategy_types.any(UnifiedType.id.in_(circular_strategy_type_ids)))
-
-    query = query.order_by(Collector.name.asc())
-    results = session.execute(query)
-
-    collectors_results = [CollectorRead.from_collector(collector) for collector in results.scalars().unique()]
-    return SearchResponse[CollectorRead](results=collectors_results)
+async def search(payload: CollectorSearchRequest, session: AsyncSession = Depends(get_async_session)):
+    return ORJSONResponse(await session.run_sync(search_collectors, payload))
+
+
+def search_collectors(session, payload):
+    rows, next_cursor, total, facets = run_search(session, COLLECTOR_SEARCH_SPEC, payload)
+    link_models = COLLECTOR_SEARCH_SPEC.link_models()
+    type_labels = read_linked_type_labels(session, link_models, "collector_id", [row.id for row in rows])
+    results = partner_results(rows, COLLECTOR_RESULT_FIELDS, link_models, type_labels)
+    return search_response(results, next_cursor, total, facets)
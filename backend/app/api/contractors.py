@@ -6,21 +6,69 @@ from app.models.contractor_model import (
     ContractorToMaterialType,
     ContractorToWasteCodeType,
 )
-from app.models.unified_type_model import UnifiedType
 from app.schemas.contractor_schema import (
+    ContractorBase,
     ContractorCreate,
     ContractorFilterOptions,
-    ContractorRead,
     ContractorSearchRequest,
+    ContractorUpdate,
 )
 from app.schemas.search_schema import SearchResponse
 from app.types import CircularServiceType, MaterialType, WasteCodeType
-from app.utils.database import get_session, read_types, read_types_by_values_or_throw
-from fastapi import APIRouter, Depends, HTTPException, status
+from app.utils.database import (
+    cached_types_response,
+    create_partners,
+    delete_row_by_id,
+    get_async_session,
+    get_session,
+    read_linked_type_labels,
+    read_types,
+    truncate_tables,
+    update_partner,
+)
+from app.utils.search import (
+    SearchSpec,
+    TypeLink,
+    partner_results,
+    run_search,
+    search_response,
+)
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlmodel import select
 
 router = APIRouter()
 
+# type collections of the create and update schemas with their link model and type class
+CONTRACTOR_TYPE_LINKS = {
+    "material_types": (ContractorToMaterialType, MaterialType),
+    "waste_code_types": (ContractorToWasteCodeType, WasteCodeType),
+    "circular_service_types": (ContractorToCircularServiceType, CircularServiceType),
+}
+
+# the columns of the search results, the type collections are read from the link tables
+CONTRACTOR_RESULT_FIELDS = [field for field in ContractorBase.__fields__ if field in Contractor.__table__.c]
+
+CONTRACTOR_SEARCH_SPEC = SearchSpec(
+    # only the result columns are selected as plain tuples, no ORM instances are built
+    query=select(*(getattr(Contractor, field) for field in CONTRACTOR_RESULT_FIELDS), Contractor.id),
+    key_column=Contractor.id,
+    sort_columns=[Contractor.name, Contractor.id],
+    sort_key=lambda row: (row.name, row.id),
+    text_column=Contractor.name,
+    type_fields={
+        "material_type_ids": TypeLink("material_types", ContractorToMaterialType, "contractor_id"),
+        "waste_code_type_ids": TypeLink("waste_code_types", ContractorToWasteCodeType, "contractor_id"),
+        "circular_service_type_ids": TypeLink(
+            "circular_service_types", ContractorToCircularServiceType, "contractor_id"
+        ),
+    },
+    location_columns=(Contractor.latitude, Contractor.longitude),
+)
+
 
 @router.post("/")
 def create_contractors(
@@ -30,29 +78,10 @@ def create_contractors(
     if not payload:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No contractors found in payload")
 
-    contractors_to_create = []
-    for contractor_create in payload:
-        material_types = read_types_by_values_or_throw(session, MaterialType, contractor_create.material_types)
-        waste_code_types = read_types_by_values_or_throw(session, WasteCodeType, contractor_create.waste_code_types)
-        circular_service_types = read_types_by_values_or_throw(
-            session, CircularServiceType, contractor_create.circular_service_types
-        )
-
-        contractor = Contractor(
-            **contractor_create.dict(
-                exclude_unset=True,
-                exclude={"material_types", "waste_code_types", "circular_service_types"},
-            ),
-            material_types=material_types,
-            waste_code_types=waste_code_types,
-            circular_service_types=circular_service_types,
-        )
-        contractors_to_create.append(contractor)
-
-    session.add_all(contractors_to_create)
+    contractors = create_partners(session, Contractor, "contractor_id", CONTRACTOR_TYPE_LINKS, payload)
     session.commit()
 
-    return [contractor.dict() for contractor in contractors_to_create]
+    return contractors
 
 
 @router.put("/{id}")
@@ -61,30 +90,27 @@ def update_contractor(
     payload: ContractorCreate,
     session: Session = Depends(get_session),
 ):
-    contractor = session.get(Contractor, id)
+    contractor = update_partner(session, Contractor, "contractor_id", CONTRACTOR_TYPE_LINKS, id, payload.dict())
     if not contractor:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contractor not found")
-
-    material_types = read_types_by_values_or_throw(session, MaterialType, payload.material_types)
-    waste_code_types = read_types_by_values_or_throw(session, WasteCodeType, payload.waste_code_types)
-    circular_service_types = read_types_by_values_or_throw(session, CircularServiceType, payload.circular_service_types)
-
-    contractor.name = payload.name
-    contractor.address = payload.address
-    contractor.zip_code = payload.zip_code
-    contractor.city = payload.city
-    contractor.latitude = payload.latitude
-    contractor.longitude = payload.longitude
-    contractor.email = payload.email
-    contractor.phone = payload.phone
-    contractor.material_types = material_types
-    contractor.waste_code_types = waste_code_types
-    contractor.circular_service_types = circular_service_types
-
-    session.add(contractor)
     session.commit()
+    return contractor
 
-    return contractor.dict()
+
+@router.patch("/{id}")
+def patch_contractor(
+    id: int,
+    payload: ContractorUpdate,
+    session: Session = Depends(get_session),
+):
+    # only the submitted fields are updated, the row is not written if they equal the stored state
+    contractor = update_partner(
+        session, Contractor, "contractor_id", CONTRACTOR_TYPE_LINKS, id, payload.dict(exclude_unset=True)
+    )
+    if not contractor:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contractor not found")
+    session.commit()
+    return contractor
 
 
 @router.delete("/{id}")
@@ -92,62 +118,54 @@ def delete_contractor(
     id: int,
     session: Session = Depends(get_session),
 ):
-    contractor = session.get(Contractor, id)
+    contractor = delete_row_by_id(session, Contractor, id)
     if not contractor:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contractor not found")
-
-    session.delete(contractor)
     session.commit()
-
-    return contractor.dict()
+    return contractor
 
 
 @router.delete("/")
 def delete_all_contractors(
+    reset: bool = False,
     session: Session = Depends(get_session),
 ):
-    session.query(ContractorToMaterialType).delete()
-    session.query(ContractorToWasteCodeType).delete()
-    session.query(ContractorToCircularServiceType).delete()
-    session.query(Contractor).delete()
+    # reset truncates the tables and restarts the ids, e.g. before reseeding a staging database
+    if reset:
+        truncate_tables(session, Contractor)
+    else:
+        session.execute(delete(Contractor))
     session.commit()
-
     return {"message": "All contractors deleted"}
 
 
 @router.get("/filter/", response_model=ContractorFilterOptions)
-def read_filter_options(session: Session = Depends(get_session)):
-    material_types = read_types(session, MaterialType)
-    waste_code_types = read_types(session, WasteCodeType)
-    circular_service_types = read_types(session, CircularServiceType)
-    return ContractorFilterOptions(
-        material_types=material_types,
-        waste_code_types=waste_code_types,
-        circular_service_types=circular_service_types,
-    )
+async def read_filter_options(request: Request, session: AsyncSession = Depends(get_async_session)):
+    return await session.run_sync(filter_options_response, request)
 
 
-@router.post("/search", response_model=SearchResponse)
-def search(payload: ContractorSearchRequest, session: Session = Depends(get_session)):
-    text = payload.query.text if len(payload.query.text) > 0 else None
-    material_type_ids = payload.filter.material_type_ids
-    waste_code_type_ids = payload.filter.waste_code_type_ids
-    circular_service_type_ids = payload.filter.circular_service_type_ids
+def filter_options_response(session, request):
+    def build():
+        material_types = read_types(session, MaterialType)
+        waste_code_types = read_types(session, WasteCodeType)
+        circular_service_types = read_types(session, CircularServiceType)
+        return ContractorFilterOptions(
+            material_types=material_types,
+            waste_code_types=waste_code_types,
+            circular_service_types=circular_service_types,
+        )
 
-    query = session.query(Contractor)
+    return cached_types_response(request, session, "contractors", build)
 
-    if text:
-        query = query.where(Contractor.name.ilike(f"%{text}%"))
 
-    if material_type_ids:
-        query = query.where(Contractor.material_types.any(UnifiedType.id.in_(material_type_ids)))
-    if waste_code_type_ids:
-        query = query.where(Contractor.waste_code_types.any(UnifiedType.id.in_(waste_code_type_ids)))
-    if circular_service_type_ids:
-        query = query.where(Contractor.circular_service_types.any(UnifiedType.id.in_(circular_service_type_ids)))
+@router.post("/search", response_model=SearchResponse)
+async def search(payload: ContractorSearchRequest, session: AsyncSession = Depends(get_async_session)):
+    return ORJSONResponse(await session.run_sync(search_contractors, payload))
 
-    query = query.order_by(Contractor.name.asc())
-    results = session.execute(query)
 
-    contractors_results = [ContractorRead.from_contractor(contractor) for contractor in results.scalars().unique()]
-    return SearchResponse[ContractorRead](results=contractors_results)
+def search_contractors(session, payload):
+    rows, next_cursor, total, facets = run_search(session, CONTRACTOR_SEARCH_SPEC, payload)
+    link_models = CONTRACTOR_SEARCH_SPEC.link_models()
+    type_labels = read_linked_type_labels(session, link_models, "contractor_id", [row.id for row in rows])
+    results = partner_results(rows, CONTRACTOR_RESULT_FIELDS, link_models, type_labels)
+    return search_response(results, next_cursor, total, facets)
@@ -0,0 +1,167 @@
+import asyncio
+from collections import defaultdict
+
+from app.api.building_elements import search_building_elements
+from app.api.collectors import search_collectors
+from app.api.contractors import search_contractors
+from app.models.collector_model import (
+    Collector,
+    CollectorToMaterialType,
+    CollectorToWasteCodeType,
+)
+from app.models.contractor_model import (
+    Contractor,
+    ContractorToMaterialType,
+    ContractorToWasteCodeType,
+)
+from app.schemas.building_element_schema import BuildingElementSearchRequest
+from app.schemas.collector_schema import CollectorSearchRequest
+from app.schemas.contractor_schema import ContractorSearchRequest
+from app.schemas.matches_schema import (
+    MatchesRead,
+    MatchesSearchRequest,
+    MatchScoresRequest,
+    PartnerScore,
+    UploadMatchScores,
+)
+from app.schemas.search_schema import SearchResponse
+from app.utils.database import get_session, open_async_session
+from app.utils.search import search_response
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+
+router = APIRouter()
+
+
+async def _search_in_own_session(search, request):
+    # a session runs one statement at a time, every concurrent search gets its own connection
+    async with open_async_session() as session:
+        return await session.run_sync(search, request)
+
+
+def _ids_by_label(partners, attributes):
+    ids_by_label = defaultdict(set)
+    for partner in partners:
+        for attribute in attributes:
+            for label in partner[attribute]:
+                ids_by_label[(attribute, label)].add(partner["id"])
+    return ids_by_label
+
+
+def compute_compatibilities(building_element_uploads, collectors, contractors):
+    """
+    A collector or contractor is compatible with an upload if it handles at least one material or waste code of the
+    upload's building elements.
+    """
+    attributes = ["material_types", "waste_code_types"]
+    collector_ids_by_label = _ids_by_label(collectors, attributes)
+    contractor_ids_by_label = _ids_by_label(contractors, attributes)
+
+    compatibilities = []
+    for building_element_upload in building_element_uploads:
+        labels = set()
+        for building_element in building_element_upload["building_elements"]:
+            if building_element["material_type"]:
+                labels.add(("material_types", building_element["material_type"]))
+            if building_element["waste_code_type"]:
+                labels.add(("waste_code_types", building_element["waste_code_type"]))
+
+        collector_ids = set().union(*(collector_ids_by_label.get(label, ()) for label in labels))
+        contractor_ids = set().union(*(contractor_ids_by_label.get(label, ()) for label in labels))
+        compatibilities.append(
+            {
+                "building_element_upload_id": building_element_upload["id"],
+                "collector_ids": sorted(collector_ids),
+                "contractor_ids": sorted(contractor_ids),
+            }
+        )
+    return compatibilities
+
+
+@router.post("/search/", response_model=SearchResponse[MatchesRead])
+async def search_matches(request: MatchesSearchRequest):
+    pagination = request.pagination or MatchesSearchRequest.Pagination()
+    building_element_search_request = BuildingElementSearchRequest(
+        query=request.query.dict(),
+        filter=request.filter.building_element,
+        include_facets=request.include_facets,
+        pagination=pagination.building_element,
+    )
+    collector_search_request = CollectorSearchRequest(
+        query=request.query.dict(),
+        filter=request.filter.collector,
+        include_facets=request.include_facets,
+        pagination=pagination.collector,
+    )
+    contractor_search_request = ContractorSearchRequest(
+        query=request.query.dict(),
+        filter=request.filter.contractor,
+        include_facets=request.include_facets,
+        pagination=pagination.contractor,
+    )
+
+    building_element_uploads, collectors, contractors = await asyncio.gather(
+        _search_in_own_session(search_building_elements, building_element_search_request),
+        _search_in_own_session(search_collectors, collector_search_request),
+        _search_in_own_session(search_contractors, contractor_search_request),
+    )
+
+    compatibilities = None
+    if request.include_compatibilities:
+        compatibilities = compute_compatibilities(
+            building_element_uploads["results"], collectors["results"], contractors["results"]
+        )
+
+    searches = {
+        "building_element": building_element_uploads,
+        "collector": collectors,
+        "contractor": contractors,
+    }
+    facets = None
+    if request.include_facets:
+        facets = {key: search["facets"] for key, search in searches.items()}
+
+    # same shape as MatchesRead
+    matches = {
+        "building_element_uploads": building_element_uploads["results"],
+        "collectors": collectors["results"],
+        "contractors": contractors["results"],
+        "compatibilities": compatibilities,
+        "facets": facets,
+        "next_cursors": {key: search["next_cursor"] for key, search in searches.items()},
+        "totals": {key: search["total"] for key, search in searches.items()},
+    }
+    return ORJSONResponse(search_response([matches], None, None, None))
+
+
+@router.post("/scores/", response_model=SearchResponse[UploadMatchScores])
+def score_partners(request: MatchScoresRequest, session: Session = Depends(get_session)):
+    # numpy is only imported by the first scoring request instead of by every cold start
+    from app.utils.matching import (
+        load_partner_vectors,
+        load_upload_vectors,
+        score_matches,
+    )
+
+    if request.partner_type == "collector":
+        partners = load_partner_vectors(
+            session, Collector, [CollectorToMaterialType, CollectorToWasteCodeType], "collector_id"
+        )
+    else:
+        partners = load_partner_vectors(
+            session, Contractor, [ContractorToMaterialType, ContractorToWasteCodeType], "contractor_id"
+        )
+    uploads = load_upload_vectors(session, request.building_element_upload_ids)
+
+    results = [
+        UploadMatchScores(
+            building_element_upload_id=upload_id,
+            partners=[
+                PartnerScore(partner_id=partner_id, score=score, distance_km=distance_km, compatibility=compatibility)
+                for partner_id, score, distance_km, compatibility in matches
+            ],
+        )
+        for upload_id, matches in score_matches(uploads, partners, request.top_k, request.distance_scale_km)
+    ]
+    return SearchResponse[UploadMatchScores](results=results)
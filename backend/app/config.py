@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import BaseSettings
 
 
@@ -6,6 +8,19 @@ class Settings(BaseSettings):
     ENV: str = "prod"
     FRONTEND_URL: str
     POSTGRES_CONNECTION_STRING: str
+    # async endpoints, derived from POSTGRES_CONNECTION_STRING with the asyncpg driver if not set
+    ASYNC_POSTGRES_CONNECTION_STRING: Optional[str]
+    # connection pool per engine and process, "null" to open a connection per request behind an external pooler
+    DB_POOL_MODE: Literal["queue", "null"] = "queue"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # seconds to wait for a free connection before failing the request
+    DB_POOL_TIMEOUT: float = 30
+    # seconds after which connections are replaced, below the idle timeout of the database or pooler
+    DB_POOL_RECYCLE: int = 300
+    DB_POOL_PRE_PING: bool = True
+    # sessions of the search and filter endpoints, "sync" runs them on the threadpool with the sync engine instead
+    DB_SEARCH_SESSIONS: Literal["async", "sync"] = "async"
 
     class Config:
         env_file = "./.env"
@@ -1,9 +1,13 @@
 from app.api.building_elements import router as building_elements_router
 from app.api.collectors import router as collectors_router
 from app.api.contractors import router as contractors_router
+from app.api.matches import router as matches_router
 from app.config import settings
+from app.utils.database import async_engine, engine, unified_type_registry
+from app.utils.pools import pool_stats
 from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.orm import configure_mappers
 
 app = FastAPI()
 
@@ -37,6 +41,19 @@ app.include_router(
     prefix="/api/contractors",
 )
 
+app.include_router(
+    matches_router,
+    tags=["matches"],
+    prefix="/api/matches",
+)
+
+
+@app.on_event("startup")
+def configure_models():
+    # configures the mappers of all models before the first request is served instead of during its first query,
+    # this moves the cost out of the first request's latency but it is still part of the cold start
+    configure_mappers()
+
 
 @app.get("/")
 def running():
@@ -46,5 +63,9 @@ def running():
 
 @app.get("/api/healthcheck")
 def healthcheck():
-    # for docker healthcheck needed
-    return Response(status_code=status.HTTP_200_OK, content="Backend is healthy")
+    # for docker healthcheck needed, the pool statistics are per process
+    return {
+        "status": "Backend is healthy",
+        "pools": {"sync": pool_stats(engine.pool), "async": pool_stats(async_engine.sync_engine.pool)},
+        "unified_types": unified_type_registry.stats(),
+    }
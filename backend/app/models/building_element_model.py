@@ -15,6 +15,7 @@ from app.types import (
     ReusePotentialType,
     WasteCodeType,
 )
+from sqlalchemy import ForeignKeyConstraint, Index
 from sqlmodel import Field, Relationship
 
 # avoid circular imports
@@ -24,14 +25,28 @@ if TYPE_CHECKING:
 
 class BuildingElementUpload(BuildingElementUploadBase, RondasBase, table=True):
     __tablename__ = "building_element_upload"
+    __table_args__ = (Index("ix_building_element_upload_latitude_longitude", "latitude", "longitude"),)
 
     building_elements: List["BuildingElement"] = Relationship(back_populates="building_element_upload")
 
 
 class BuildingElement(BuildingElementBase, RondasBase, table=True):
     __tablename__ = "building_element"
+    __table_args__ = (
+        Index(
+            "ix_building_element_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        # building elements are deleted by the database together with their upload, the index serves the lookups
+        Index("ix_building_element_building_element_upload_id", "building_element_upload_id"),
+        # keyset pagination of the searches, see building_elements.py
+        Index("ix_building_element_building_element_upload_id_id", "building_element_upload_id", "id"),
+        ForeignKeyConstraint(["building_element_upload_id"], ["building_element_upload.id"], ondelete="CASCADE"),
+    )
 
-    building_element_upload_id: int = Field(foreign_key="building_element_upload.id")
+    building_element_upload_id: int
     building_element_upload: BuildingElementUpload = Relationship(back_populates="building_elements")
 
     worksheet_type_id: int = Field(foreign_key="unified_type.id")
@@ -2,6 +2,8 @@ from typing import TYPE_CHECKING, List
 
 from app.models._base_model import RondasBase
 from app.schemas.collector_schema import CollectorBase
+from sqlalchemy import ForeignKeyConstraint, Index
+from sqlalchemy.orm import declared_attr
 from sqlmodel import Field, Relationship, SQLModel
 
 # avoid circular imports
@@ -10,7 +12,12 @@ if TYPE_CHECKING:
 
 
 class CollectorToTypeBase(SQLModel):
-    collector_id: int = Field(default=None, foreign_key="collector.id", primary_key=True)
+    @declared_attr
+    def __table_args__(cls):
+        # link rows are deleted by the database together with their collector
+        return (ForeignKeyConstraint(["collector_id"], ["collector.id"], ondelete="CASCADE"),)
+
+    collector_id: int = Field(default=None, primary_key=True)
     unified_type_id: int = Field(default=None, foreign_key="unified_type.id", primary_key=True)
 
 
@@ -32,6 +39,17 @@ class CollectorToCircularStrategyType(CollectorToTypeBase, table=True):
 
 class Collector(CollectorBase, RondasBase, table=True):
     __tablename__ = "collector"
+    __table_args__ = (
+        Index(
+            "ix_collector_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index("ix_collector_latitude_longitude", "latitude", "longitude"),
+        # keyset pagination of the searches, see collectors.py
+        Index("ix_collector_name_id", "name", "id"),
+    )
 
     material_types: List["UnifiedType"] = Relationship(
         back_populates="collector_material_types",
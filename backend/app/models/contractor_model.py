@@ -2,6 +2,8 @@ from typing import TYPE_CHECKING, List
 
 from app.models._base_model import RondasBase
 from app.schemas.contractor_schema import ContractorBase
+from sqlalchemy import ForeignKeyConstraint, Index
+from sqlalchemy.orm import declared_attr
 from sqlmodel import Field, Relationship, SQLModel
 
 # avoid circular imports
@@ -10,7 +12,12 @@ if TYPE_CHECKING:
 
 
 class ContractorToTypeBase(SQLModel):
-    contractor_id: int = Field(default=None, foreign_key="contractor.id", primary_key=True)
+    @declared_attr
+    def __table_args__(cls):
+        # link rows are deleted by the database together with their contractor
+        return (ForeignKeyConstraint(["contractor_id"], ["contractor.id"], ondelete="CASCADE"),)
+
+    contractor_id: int = Field(default=None, primary_key=True)
     unified_type_id: int = Field(default=None, foreign_key="unified_type.id", primary_key=True)
 
 
@@ -28,6 +35,17 @@ class ContractorToCircularServiceType(ContractorToTypeBase, table=True):
 
 class Contractor(ContractorBase, RondasBase, table=True):
     __tablename__ = "contractor"
+    __table_args__ = (
+        Index(
+            "ix_contractor_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index("ix_contractor_latitude_longitude", "latitude", "longitude"),
+        # keyset pagination of the searches, see contractors.py
+        Index("ix_contractor_name_id", "name", "id"),
+    )
 
     material_types: List["UnifiedType"] = Relationship(
         back_populates="contractor_material_types",
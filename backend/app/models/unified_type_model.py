@@ -15,11 +15,16 @@ from app.models.contractor_model import (
     ContractorToWasteCodeType,
 )
 from app.schemas.type_schema import UnifiedTypeBase
+from sqlalchemy import UniqueConstraint
 from sqlmodel import Field, Relationship
 
 
 class UnifiedType(UnifiedTypeBase, table=True):
     __tablename__ = "unified_type"
+    __table_args__ = (
+        UniqueConstraint("discriminator", "type_label", name="uq_unified_type_discriminator_type_label"),
+        UniqueConstraint("discriminator", "type_id", name="uq_unified_type_discriminator_type_id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
 
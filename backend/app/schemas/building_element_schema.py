@@ -4,6 +4,7 @@
 
 from typing import List, Optional
 
+from app.schemas.search_schema import LocationFilter, NumberRange, Pagination
 from app.schemas.type_schema import UnifiedTypeRead
 from pydantic import BaseModel
 from sqlmodel import SQLModel
@@ -121,6 +122,11 @@ class BuildingElementSearchRequest(BaseModel):
         waste_code_type_ids: List[int]
         recycling_potential_type_ids: List[int]
         circular_service_needed_type_ids: List[int]
+        total_mass_kg: Optional[NumberRange]
+        total_volume_m3: Optional[NumberRange]
+        location: Optional[LocationFilter]
 
     query: Query
     filter: Filter
+    pagination: Optional[Pagination]
+    include_facets: bool = False
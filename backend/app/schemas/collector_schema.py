@@ -4,8 +4,9 @@
 
 from typing import List, Optional
 
+from app.schemas.search_schema import LocationFilter, Pagination
 from app.schemas.type_schema import UnifiedTypeRead
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 from sqlmodel import SQLModel
 
 
@@ -29,6 +30,41 @@ class CollectorCreate(CollectorBase):
     pass
 
 
+class CollectorUpdate(SQLModel):
+    name: Optional[str]
+    address: Optional[str]
+    zip_code: Optional[str]
+    city: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    email: Optional[str]
+    phone: Optional[str]
+
+    material_types: Optional[List[str]]
+    waste_code_types: Optional[List[str]]
+    authorized_vehicle_types: Optional[List[str]]
+    circular_strategy_types: Optional[List[str]]
+
+    @validator(
+        "name",
+        "address",
+        "zip_code",
+        "city",
+        "latitude",
+        "longitude",
+        "material_types",
+        "waste_code_types",
+        "authorized_vehicle_types",
+        "circular_strategy_types",
+        pre=True,
+    )
+    def not_null(cls, value):
+        # fields can be left out, but only the nullable ones can be set to null
+        if value is None:
+            raise ValueError("none is not an allowed value")
+        return value
+
+
 class CollectorRead(CollectorBase):
     id: int
 
@@ -66,6 +102,9 @@ class CollectorSearchRequest(BaseModel):
         waste_code_type_ids: List[int]
         authorized_vehicle_type_ids: List[int]
         circular_strategy_type_ids: List[int]
+        location: Optional[LocationFilter]
 
     query: Query
     filter: Filter
+    pagination: Optional[Pagination]
+    include_facets: bool = False
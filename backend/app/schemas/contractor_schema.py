@@ -4,8 +4,9 @@
 
 from typing import List, Optional
 
+from app.schemas.search_schema import LocationFilter, Pagination
 from app.schemas.type_schema import UnifiedTypeRead
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 from sqlmodel import SQLModel
 
 
@@ -28,6 +29,39 @@ class ContractorCreate(ContractorBase):
     pass
 
 
+class ContractorUpdate(SQLModel):
+    name: Optional[str]
+    address: Optional[str]
+    zip_code: Optional[str]
+    city: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    email: Optional[str]
+    phone: Optional[str]
+
+    material_types: Optional[List[str]]
+    waste_code_types: Optional[List[str]]
+    circular_service_types: Optional[List[str]]
+
+    @validator(
+        "name",
+        "address",
+        "zip_code",
+        "city",
+        "latitude",
+        "longitude",
+        "material_types",
+        "waste_code_types",
+        "circular_service_types",
+        pre=True,
+    )
+    def not_null(cls, value):
+        # fields can be left out, but only the nullable ones can be set to null
+        if value is None:
+            raise ValueError("none is not an allowed value")
+        return value
+
+
 class ContractorRead(ContractorBase):
     id: int
 
@@ -60,6 +94,9 @@ class ContractorSearchRequest(BaseModel):
         material_type_ids: List[int]
         waste_code_type_ids: List[int]
         circular_service_type_ids: List[int]
+        location: Optional[LocationFilter]
 
     query: Query
     filter: Filter
+    pagination: Optional[Pagination]
+    include_facets: bool = False
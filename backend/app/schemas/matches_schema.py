@@ -0,0 +1,77 @@
+###########################################################################
+# IMPORTANT: Keep in sync with MatchesSearchRequest in                    #
+# frontend/types/api/building-element.ts and frontend/lib/api/matches.ts  #
+###########################################################################
+
+from typing import Dict, List, Literal, Optional
+
+from app.schemas.building_element_schema import (
+    BuildingElementSearchRequest,
+    BuildingElementUploadRead,
+)
+from app.schemas.collector_schema import CollectorRead, CollectorSearchRequest
+from app.schemas.contractor_schema import ContractorRead, ContractorSearchRequest
+from app.schemas.search_schema import Pagination as SearchPagination
+from pydantic import BaseModel, Field
+
+
+class MatchesSearchRequest(BaseModel):
+    class Query(BaseModel):
+        text: str
+
+    class Filter(BaseModel):
+        building_element: BuildingElementSearchRequest.Filter
+        collector: CollectorSearchRequest.Filter
+        contractor: ContractorSearchRequest.Filter
+
+    class Pagination(BaseModel):
+        # each search is paginated on its own, with the cursor of its own next_cursors entry
+        building_element: Optional[SearchPagination]
+        collector: Optional[SearchPagination]
+        contractor: Optional[SearchPagination]
+
+    query: Query
+    filter: Filter
+    pagination: Optional[Pagination]
+    include_compatibilities: bool = False
+    include_facets: bool = False
+
+
+class UploadCompatibility(BaseModel):
+    building_element_upload_id: int
+    collector_ids: List[int]
+    contractor_ids: List[int]
+
+
+class MatchesRead(BaseModel):
+    building_element_uploads: List[BuildingElementUploadRead]
+    collectors: List[CollectorRead]
+    contractors: List[ContractorRead]
+    # compatibilities between the returned pages only
+    compatibilities: Optional[List[UploadCompatibility]]
+    # next_cursor and total of each search keyed like MatchesSearchRequest.Filter, see SearchResponse
+    next_cursors: Dict[str, Optional[str]]
+    totals: Dict[str, Optional[int]]
+    # facets of each search keyed like MatchesSearchRequest.Filter, see SearchResponse.facets
+    facets: Optional[Dict[str, Dict[str, Dict[int, int]]]]
+
+
+class MatchScoresRequest(BaseModel):
+    partner_type: Literal["collector", "contractor"]
+    top_k: int = Field(10, gt=0, le=100)
+    # distance at which a fully compatible partner scores 0.5
+    distance_scale_km: float = Field(50, gt=0)
+    # all uploads if not set
+    building_element_upload_ids: Optional[List[int]]
+
+
+class PartnerScore(BaseModel):
+    partner_id: int
+    score: float
+    distance_km: float
+    compatibility: float
+
+
+class UploadMatchScores(BaseModel):
+    building_element_upload_id: int
+    partners: List[PartnerScore]
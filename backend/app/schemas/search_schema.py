@@ -2,12 +2,52 @@
 # IMPORTANT: Keep in sync with frontend/types/api/search.ts       #
 ###################################################################
 
-from typing import Generic, List, TypeVar
+from typing import Dict, Generic, List, Optional, TypeVar
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 T = TypeVar("T")
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class Pagination(BaseModel):
+    limit: int = Field(DEFAULT_PAGE_SIZE, gt=0, le=MAX_PAGE_SIZE)
+    # opaque keyset cursor as returned in SearchResponse.next_cursor, None for the first page
+    cursor: Optional[str]
+    include_total: bool = False
+
 
 class SearchResponse(BaseModel, Generic[T]):
     results: List[T]
+    next_cursor: Optional[str]
+    total: Optional[int]
+    # filter option key -> unified type id -> number of matching results, only if requested with include_facets
+    facets: Optional[Dict[str, Dict[int, int]]]
+
+
+class NumberRange(BaseModel):
+    # inclusive bounds, unbounded if not set
+    min: Optional[float]
+    max: Optional[float]
+
+
+class BoundingBox(BaseModel):
+    min_latitude: float = Field(ge=-90, le=90)
+    min_longitude: float = Field(ge=-180, le=180)
+    max_latitude: float = Field(ge=-90, le=90)
+    # smaller than min_longitude if the box crosses the antimeridian
+    max_longitude: float = Field(ge=-180, le=180)
+
+
+class RadiusArea(BaseModel):
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+    # up to half the circumference of the earth, which already contains every point
+    radius_km: float = Field(gt=0, le=20016)
+
+
+class LocationFilter(BaseModel):
+    bounding_box: Optional[BoundingBox]
+    radius: Optional[RadiusArea]
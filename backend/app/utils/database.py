@@ -1,7 +1,33 @@
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
 from app.config import settings
 from app.models.unified_type_model import UnifiedType
-from fastapi import HTTPException, status
-from sqlalchemy.orm import sessionmaker
+from app.utils.pools import pool_options
+from fastapi import HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import (
+    bindparam,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    text,
+    true,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import make_transient_to_detached, sessionmaker
 from sqlmodel import create_engine, select
 
 DB_CONNECTION_STRING = settings.POSTGRES_CONNECTION_STRING
@@ -9,61 +35,481 @@ DB_CONNECTION_STRING = settings.POSTGRES_CONNECTION_STRING
 # sqlalchemy logs
 echo = True if settings.ENV == "local" else False
 
-engine = create_engine(DB_CONNECTION_STRING, echo=echo, future=True)
+engine = create_engine(DB_CONNECTION_STRING, echo=echo, future=True, **pool_options(DB_CONNECTION_STRING))
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+
+def to_async_connection_string(connection_string):
+    url = make_url(connection_string)
+    query = dict(url.query)
+    # asyncpg names the libpq sslmode parameter ssl
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return str(url.set(drivername="postgresql+asyncpg", query=query))
+
+
+ASYNC_DB_CONNECTION_STRING = settings.ASYNC_POSTGRES_CONNECTION_STRING or to_async_connection_string(
+    DB_CONNECTION_STRING
+)
+
+# read endpoints await the database on the event loop instead of blocking a threadpool worker per request
+async_engine = create_async_engine(
+    ASYNC_DB_CONNECTION_STRING, echo=echo, future=True, **pool_options(ASYNC_DB_CONNECTION_STRING, is_async=True)
+)
+AsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
 
 
 def get_session():
-    Session = sessionmaker(bind=engine, expire_on_commit=False)
-    with Session() as session:
+    with SessionLocal() as session:
+        yield session
+
+
+class ThreadpoolSession:
+    """
+    Sync session with the `run_sync` of `AsyncSession`, the query code runs on a threadpool worker as in sync endpoints.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+@asynccontextmanager
+async def open_async_session():
+    if settings.DB_SEARCH_SESSIONS == "sync":
+        session = SessionLocal()
+        try:
+            yield ThreadpoolSession(session)
+        finally:
+            # the connection is released on a worker thread as well, as in sync endpoints
+            await run_in_threadpool(session.close)
+    else:
+        async with AsyncSessionLocal() as session:
+            yield session
+
+
+async def get_async_session():
+    """
+    Session of the async endpoints. The sync query code runs unchanged through `AsyncSession.run_sync`.
+    """
+    async with open_async_session() as session:
         yield session
 
 
-def read_or_create_type_by_name(session, model_class, name):
-    if not hasattr(model_class, "name"):
-        raise ValueError(f"{model_class} is not an instance of UnifiedTypeBase")
+class UnifiedTypeSnapshot:
+    def __init__(self, rows):
+        self.by_label = {}
+        self.by_id = {}
+        self.by_discriminator = defaultdict(list)
+        for id, discriminator, type_id, type_label in rows:
+            instance = UnifiedType(id=id, discriminator=discriminator, type_id=type_id, type_label=type_label)
+            make_transient_to_detached(instance)
+            self.by_label[(discriminator, type_label)] = instance
+            self.by_id[id] = instance
+            self.by_discriminator[discriminator].append(instance)
+        self.labels = {id: instance.type_label for id, instance in self.by_id.items()}
+        # changes whenever the content of the table changes, used as HTTP entity tag
+        self.version = hashlib.sha1(repr(rows).encode()).hexdigest()
+        # values derived from this snapshot, e.g. serialized responses, dropped together with it
+        self.derived = {}
+
+
+# a lookup of an unknown label or id reloads the table at most this often per process, e.g. for types created by
+# other workers
+UNKNOWN_TYPE_RELOAD_SECONDS = 1
+
+
+class UnifiedTypeRegistry:
+    """
+    Process-wide in-memory copy of the unified_type table.
+
+    The table is loaded once with a single query and then serves all lookups by
+    (discriminator, type_label), by id and from id to label. Cached instances are
+    detached and shared between sessions, write paths only use their ids.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # replaced as a whole on reload such that readers never see a partially loaded table
+        self._snapshot = None
+        self._next_reload = 0
+        # lookups served by the loaded table and lookups that loaded it first
+        self.hits = 0
+        self.misses = 0
+        # reloads for unknown labels or ids and lookups still unknown afterwards
+        self.reloads = 0
+        self.unknown = 0
+
+    def load(self, session):
+        rows = session.execute(
+            select(UnifiedType.id, UnifiedType.discriminator, UnifiedType.type_id, UnifiedType.type_label).order_by(
+                UnifiedType.id
+            )
+        ).all()
+        snapshot = UnifiedTypeSnapshot([tuple(row) for row in rows])
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def _get_snapshot(self, session):
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.misses += 1
+            return self.load(session)
+        self.hits += 1
+        return snapshot
+
+    def _reload_unknown(self, session, snapshot):
+        """
+        Returns the snapshot to look an unknown label or id up again in, reloaded unless another lookup reloaded it
+        already or the last reload is less than UNKNOWN_TYPE_RELOAD_SECONDS ago.
+        """
+        with self._lock:
+            current = self._snapshot
+            if current is snapshot:
+                now = time.monotonic()
+                if now < self._next_reload:
+                    return snapshot
+                self._next_reload = now + UNKNOWN_TYPE_RELOAD_SECONDS
+        if current is not None and current is not snapshot:
+            return current
+        self.reloads += 1
+        return self.load(session)
+
+    def _lookup(self, session, get):
+        snapshot = self._get_snapshot(session)
+        instance = get(snapshot)
+        if instance is None:
+            instance = get(self._reload_unknown(session, snapshot))
+        if instance is None:
+            self.unknown += 1
+        return instance
+
+    def get_by_value(self, session, discriminator, type_label):
+        return self._lookup(session, lambda snapshot: snapshot.by_label.get((discriminator, type_label)))
+
+    def get_by_id(self, session, id):
+        return self._lookup(session, lambda snapshot: snapshot.by_id.get(id))
+
+    def get_labels(self, session, ids=()):
+        """
+        Returns id -> label of all types, reloaded first if one of ids is unknown.
+        """
+        snapshot = self._get_snapshot(session)
+        if any(id not in snapshot.labels for id in ids):
+            snapshot = self._reload_unknown(session, snapshot)
+        return snapshot.labels
+
+    def get_all(self, session, discriminator):
+        return list(self._get_snapshot(session).by_discriminator.get(discriminator, []))
+
+    def get_derived(self, session, key, build):
+        """
+        Returns (version, value) where value is built once per snapshot, e.g. a serialized filter options response.
+        """
+        snapshot = self._get_snapshot(session)
+        if key not in snapshot.derived:
+            snapshot.derived[key] = build()
+        return snapshot.version, snapshot.derived[key]
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            "loaded": snapshot is not None,
+            "size": len(snapshot.by_id) if snapshot is not None else 0,
+            "version": snapshot.version if snapshot is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "unknown": self.unknown,
+        }
+
+
+unified_type_registry = UnifiedTypeRegistry()
+
+
+def ilike_contains(column, text):
+    # escape LIKE wildcards in user input, the column is left untouched such that a trigram index can be used
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.ilike(f"%{escaped}%", escape="\\")
+
+
+def normalize_type_label(name):
+    return " ".join(name.split())
+
 
-    name = name.strip().upper()
-    statement = select(model_class).where(model_class.name == name)
-    result = session.execute(statement)
-    instance = result.scalars().first()
-    if not instance:
-        instance = model_class(name=name)
-        session.add(instance)
+def read_or_create_types_by_names(session, type_class, names):
+    """
+    Returns the unified types of type_class with the given names in their order, creating the missing ones.
+
+    Names are normalized and de-duplicated, existing types are read with one query and the missing ones inserted with
+    a single INSERT ... ON CONFLICT DO NOTHING RETURNING, all within one transaction. Creations of the same
+    discriminator are serialized with an advisory lock and the unique constraints on (discriminator, type_label) and
+    (discriminator, type_id) make concurrent calls safe, types inserted by a concurrent transaction are read again.
+    """
+    labels = list(dict.fromkeys(label for label in map(normalize_type_label, names) if label))
+    if not labels:
+        return []
+    discriminator = type_class.DISCRIMINATOR
+    table = UnifiedType.__table__
+
+    statement = select(UnifiedType).where(
+        UnifiedType.discriminator == discriminator, UnifiedType.type_label.in_(labels)
+    )
+    instances = {instance.type_label: instance for instance in session.execute(statement).scalars()}
+    missing = [label for label in labels if label not in instances]
+    if missing:
+        # serializes the creations per discriminator until commit, otherwise concurrent calls creating different names
+        # read the same largest type id and assign it twice
+        session.execute(select(func.pg_advisory_xact_lock(func.hashtext(discriminator))))
+        # type ids continue after the largest one of the discriminator in the order of the names
+        max_type_id = (
+            select(func.coalesce(func.max(table.c.type_id), 0))
+            .where(table.c.discriminator == discriminator)
+            .scalar_subquery()
+        )
+        new_labels = (
+            func.unnest(bindparam("labels", type_=ARRAY(table.c.type_label.type)))
+            .table_valued("label", with_ordinality="ordinality")
+            .render_derived()
+        )
+        statement = (
+            postgresql.insert(table)
+            .from_select(
+                ["discriminator", "type_id", "type_label"],
+                select(literal(discriminator), max_type_id + new_labels.c.ordinality, new_labels.c.label),
+            )
+            .on_conflict_do_nothing(index_elements=["discriminator", "type_label"])
+            .returning(*table.c)
+        )
+        for row in session.execute(statement, {"labels": missing}).mappings():
+            instance = UnifiedType(**row)
+            make_transient_to_detached(instance)
+            instances[instance.type_label] = session.merge(instance, load=False)
+
+        conflicting = [label for label in missing if label not in instances]
+        if conflicting:
+            statement = select(UnifiedType).where(
+                UnifiedType.discriminator == discriminator, UnifiedType.type_label.in_(conflicting)
+            )
+            instances.update((instance.type_label, instance) for instance in session.execute(statement).scalars())
         session.commit()
-    return instance
+        unified_type_registry.invalidate()
+    return [instances[label] for label in labels]
+
 
+def read_or_create_type_by_name(session, type_class, name):
+    instances = read_or_create_types_by_names(session, type_class, [name])
+    return instances[0] if instances else None
 
-def read_or_create_types_by_names(session, model_class, names):
-    instances = [read_or_create_type_by_name(session, model_class, name) for name in names]
-    return instances
+
+def cached_types_response(request, session, key, build):
+    """
+    Serves a response that only depends on the unified_type table from the registry. The body is serialized once per
+    table state and clients revalidate with If-None-Match, receiving a 304 as long as the table did not change.
+    """
+    version, body = unified_type_registry.get_derived(
+        session, key, lambda: json.dumps(jsonable_encoder(build())).encode()
+    )
+    etag = f'"{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def read_linked_type_labels(session, link_models, foreign_key_name, ids):
+    """
+    Returns {id: {attribute: [type labels]}} of the type collections of the given collectors or contractors. All
+    link tables are read with a single statement and labels come from the registry, instead of lazy loading every
+    collection of every row.
+    """
+    if not ids:
+        return {}
+    parts = [
+        select(
+            literal(attribute).label("attribute"),
+            getattr(link_model, foreign_key_name).label("id"),
+            link_model.unified_type_id,
+        ).where(getattr(link_model, foreign_key_name).in_(ids))
+        for attribute, link_model in link_models.items()
+    ]
+    rows = session.execute(union_all(*parts).order_by("id", "unified_type_id")).all()
+    type_labels = unified_type_registry.get_labels(session, {unified_type_id for _, _, unified_type_id in rows})
+
+    labels_by_id = defaultdict(lambda: defaultdict(list))
+    for attribute, id, unified_type_id in rows:
+        labels_by_id[id][attribute].append(type_labels[unified_type_id])
+    return labels_by_id
 
 
 def read_types(session, type_class):
-    types = session.execute(select(UnifiedType).where(UnifiedType.discriminator == type_class.DISCRIMINATOR))
-    types = types.scalars().all()
-    return types
+    return unified_type_registry.get_all(session, type_class.DISCRIMINATOR)
+
+
+def type_not_found_message(type_class, value):
+    return f"type discriminator <{type_class.DISCRIMINATOR}> with value <{value}> not found"
 
 
-def read_type_by_value_or_throw(session, type_class, value):
+def read_type_id_by_value(session, type_class, value):
     if not value:
         return None
-    instance = session.execute(
-        select(UnifiedType)
-        .where(UnifiedType.discriminator == type_class.DISCRIMINATOR)
-        .where(UnifiedType.type_label == value)
+    instance = unified_type_registry.get_by_value(session, type_class.DISCRIMINATOR, value)
+    return instance.id if instance else None
+
+
+def read_type_ids_by_values_or_throw(session, type_class, values):
+    # ids of the distinct values in their order, without attaching the registry's instances to the session
+    ids = []
+    for value in dict.fromkeys(values):
+        instance = unified_type_registry.get_by_value(session, type_class.DISCRIMINATOR, value)
+        if not instance:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=type_not_found_message(type_class, value),
+            )
+        ids.append(instance.id)
+    return ids
+
+
+def insert_rows(session, table, rows, returning=False):
+    """
+    Inserts rows with a single INSERT ... SELECT FROM unnest(...) statement with one array parameter per column, such
+    that building and compiling the statement does not grow with the number of rows. If returning, the inserted rows
+    are returned in the order of rows.
+    """
+    if not rows:
+        return []
+    columns = list(rows[0])
+    unnested = (
+        func.unnest(*(bindparam(column, type_=ARRAY(table.c[column].type)) for column in columns))
+        .table_valued(*columns, with_ordinality="ordinality")
+        .render_derived()
     )
-    instance = instance.scalars().first()
-    if not instance:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"type discriminator <{type_class.DISCRIMINATOR}> with value <{value}> not found",
+    # the rows are inserted in the order of the arrays, so ids are drawn from the sequence in the order of rows
+    statement = insert(table).from_select(
+        columns, select(*(unnested.c[column] for column in columns)).order_by(unnested.c.ordinality)
+    )
+    parameters = {column: [row[column] for row in rows] for column in columns}
+    if not returning:
+        session.execute(statement, parameters)
+        return []
+    result = session.execute(statement.returning(*table.c), parameters)
+    return sorted(result.mappings(), key=lambda row: row["id"])
+
+
+def create_partners(session, model, foreign_key_name, type_links, creates):
+    """
+    Creates collectors or contractors together with their type collections and returns the inserted rows.
+
+    type_links maps each collection attribute of the create schema to its (link model, type class). All labels are
+    resolved from the registry before anything is written, then the rows and the rows of each link table are inserted
+    with one statement each, independent of the number of entities.
+    """
+    rows = []
+    type_ids = []
+    for create in creates:
+        rows.append(create.dict(exclude_unset=False, exclude=set(type_links)))
+        type_ids.append(
+            {
+                attribute: read_type_ids_by_values_or_throw(session, type_class, getattr(create, attribute))
+                for attribute, (_, type_class) in type_links.items()
+            }
+        )
+
+    inserted = insert_rows(session, model.__table__, rows, returning=True)
+    for attribute, (link_model, _) in type_links.items():
+        link_rows = [
+            {foreign_key_name: row["id"], "unified_type_id": unified_type_id}
+            for row, ids in zip(inserted, type_ids)
+            for unified_type_id in ids[attribute]
+        ]
+        insert_rows(session, link_model.__table__, link_rows)
+    return inserted
+
+
+def replace_links(session, link_model, foreign_key_name, id, type_ids):
+    """
+    Makes the link rows of the entity with the given id equal to type_ids and returns whether any row changed. The
+    difference is computed by the database, rows that are kept are neither deleted nor inserted again.
+    """
+    table = link_model.__table__
+    foreign_key = table.c[foreign_key_name]
+    deleted = session.execute(
+        delete(table).where(foreign_key == id, table.c.unified_type_id.not_in(type_ids) if type_ids else true())
+    )
+    if not type_ids:
+        return deleted.rowcount > 0
+    inserted = session.execute(
+        postgresql.insert(table)
+        .from_select(
+            [foreign_key_name, "unified_type_id"],
+            select(literal(id), func.unnest(bindparam("type_ids", type_=ARRAY(table.c.unified_type_id.type)))),
         )
-    return instance
+        .on_conflict_do_nothing(),
+        {"type_ids": type_ids},
+    )
+    return deleted.rowcount > 0 or inserted.rowcount > 0
+
+
+def update_partner(session, model, foreign_key_name, type_links, id, values):
+    """
+    Updates the collector or contractor with the given id with values, which may contain any subset of the fields of
+    its create schema, and returns it in the shape of its Read schema, or None if it does not exist.
+
+    Only the type collections present in values are diffed against their link tables. The row itself is only written
+    if a column or a collection actually changed, such that updated_at keeps its value for an unchanged submission.
+    """
+    table = model.__table__
+    type_ids = {
+        attribute: read_type_ids_by_values_or_throw(session, type_class, values[attribute])
+        for attribute, (_, type_class) in type_links.items()
+        if attribute in values
+    }
+    # locks the row such that concurrent updates of the same entity are applied one after the other
+    if session.execute(select(table.c.id).where(table.c.id == id).with_for_update()).first() is None:
+        return None
+
+    links_changed = False
+    for attribute, ids in type_ids.items():
+        link_model, _ = type_links[attribute]
+        links_changed |= replace_links(session, link_model, foreign_key_name, id, ids)
+
+    columns = {key: value for key, value in values.items() if key not in type_links}
+    row = None
+    if links_changed or columns:
+        statement = update(table).where(table.c.id == id).values(updated_at=func.current_timestamp(), **columns)
+        if not links_changed:
+            statement = statement.where(or_(*(table.c[key].is_distinct_from(value) for key, value in columns.items())))
+        row = session.execute(statement.returning(*table.c)).mappings().first()
+    if row is None:
+        row = session.execute(select(*table.c).where(table.c.id == id)).mappings().first()
+
+    labels = read_linked_type_labels(
+        session, {attribute: link_model for attribute, (link_model, _) in type_links.items()}, foreign_key_name, [id]
+    ).get(id, {})
+    return {**row, **{attribute: labels.get(attribute, []) for attribute in type_links}}
+
+
+def delete_row_by_id(session, model, id):
+    """
+    Deletes the row of model with the given id with a single statement and returns it, or None if there is none. Rows
+    referencing it, e.g. link rows or building elements, are deleted by the database through ON DELETE CASCADE instead
+    of loading them into the session first.
+    """
+    table = model.__table__
+    row = session.execute(delete(table).where(table.c.id == id).returning(*table.c)).mappings().first()
+    return dict(row) if row else None
 
 
-def read_types_by_values_or_throw(session, type_class, values):
-    instances = []
-    for value in values:
-        instance = read_type_by_value_or_throw(session, type_class, value)
-        instances.append(instance)
-    return instances
+def truncate_tables(session, *models):
+    # empties the tables without scanning them and restarts their ids, tables referencing them are emptied as well
+    names = ", ".join(model.__tablename__ for model in models)
+    session.execute(text(f"TRUNCATE {names} RESTART IDENTITY CASCADE"))
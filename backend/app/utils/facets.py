@@ -0,0 +1,26 @@
+from sqlalchemy import func, literal, select, union_all
+
+
+def count_facets(session, facets):
+    """
+    Counts the matching rows per unified type id of every facet in a single statement.
+
+    facets maps the facet name to a select of one type id column with one row per match, usually read from a CTE of
+    the filtered search such that the search is only executed once for all facets.
+    Returns {facet name: {type id: count}}, types without any match are omitted.
+    """
+    counts = {name: {} for name in facets}
+    parts = []
+    for name, query in facets.items():
+        type_ids = query.subquery()
+        type_id = list(type_ids.c)[0]
+        parts.append(
+            select(literal(name).label("facet"), type_id.label("type_id"), func.count().label("count"))
+            .where(type_id.is_not(None))
+            .group_by(type_id)
+        )
+    if not parts:
+        return counts
+    for name, type_id, count in session.execute(union_all(*parts)):
+        counts[name][type_id] = count
+    return counts
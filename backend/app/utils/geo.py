@@ -0,0 +1,62 @@
+import math
+
+from sqlalchemy import and_, func, or_, true
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _longitude_range_filter(longitude_column, min_longitude, max_longitude):
+    if min_longitude <= max_longitude:
+        return longitude_column.between(min_longitude, max_longitude)
+    # the range crosses the antimeridian
+    return or_(longitude_column >= min_longitude, longitude_column <= max_longitude)
+
+
+def bounding_box_filter(latitude_column, longitude_column, bounding_box):
+    return and_(
+        latitude_column.between(bounding_box.min_latitude, bounding_box.max_latitude),
+        _longitude_range_filter(longitude_column, bounding_box.min_longitude, bounding_box.max_longitude),
+    )
+
+
+def haversine_distance_km(latitude_column, longitude_column, latitude, longitude):
+    delta_latitude = func.radians(latitude_column - latitude)
+    delta_longitude = func.radians(longitude_column - longitude)
+    a = func.power(func.sin(delta_latitude / 2), 2) + math.cos(math.radians(latitude)) * func.cos(
+        func.radians(latitude_column)
+    ) * func.power(func.sin(delta_longitude / 2), 2)
+    # rounding can push a slightly above 1 for antipodal points, outside the domain of asin
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(func.least(a, 1.0)))
+
+
+def radius_filter(latitude_column, longitude_column, radius):
+    """
+    Restricts the columns to the enclosing box of the circle first, such that the (latitude, longitude) index can be
+    used, and checks the exact haversine distance only on the rows inside the box.
+    """
+    angular_radius = radius.radius_km / EARTH_RADIUS_KM
+    min_latitude = radius.latitude - math.degrees(angular_radius)
+    max_latitude = radius.latitude + math.degrees(angular_radius)
+    conditions = [latitude_column.between(max(min_latitude, -90), min(max_latitude, 90))]
+
+    # near the poles or for huge radii every longitude can be within the radius
+    if min_latitude > -90 and max_latitude < 90:
+        sin_ratio = math.sin(angular_radius) / math.cos(math.radians(radius.latitude))
+        if sin_ratio < 1:
+            delta_longitude = math.degrees(math.asin(sin_ratio))
+            min_longitude = (radius.longitude - delta_longitude + 180) % 360 - 180
+            max_longitude = (radius.longitude + delta_longitude + 180) % 360 - 180
+            conditions.append(_longitude_range_filter(longitude_column, min_longitude, max_longitude))
+
+    distance = haversine_distance_km(latitude_column, longitude_column, radius.latitude, radius.longitude)
+    conditions.append(distance <= radius.radius_km)
+    return and_(*conditions)
+
+
+def location_filter(latitude_column, longitude_column, location):
+    conditions = []
+    if location.bounding_box:
+        conditions.append(bounding_box_filter(latitude_column, longitude_column, location.bounding_box))
+    if location.radius:
+        conditions.append(radius_filter(latitude_column, longitude_column, location.radius))
+    return and_(*conditions) if conditions else true()
@@ -0,0 +1,157 @@
+import numpy as np
+from app.models.building_element_model import BuildingElement, BuildingElementUpload
+from app.utils.geo import EARTH_RADIUS_KM
+from sqlalchemy import select
+
+# uploads scored per batch, bounds the (batch, partners) matrices to about 100 MB each for 50k partners
+SCORING_BATCH_SIZE = 256
+
+
+def _one_hot(ids, pairs, type_index):
+    """
+    Builds a (len(ids), len(type_index)) float32 matrix from (entity id, unified type id) pairs.
+    """
+    row_index = {id: row for row, id in enumerate(ids)}
+    matrix = np.zeros((len(ids), len(type_index)), dtype=np.float32)
+    rows = []
+    columns = []
+    for id, type_id in pairs:
+        if id in row_index and type_id in type_index:
+            rows.append(row_index[id])
+            columns.append(type_index[type_id])
+    matrix[rows, columns] = 1
+    return matrix
+
+
+def load_upload_vectors(session, building_element_upload_ids=None):
+    """
+    Returns (ids, latitudes, longitudes, type pairs) of the uploads, where the type pairs are the distinct
+    (upload id, unified type id) of all material and waste code types of the upload's building elements.
+    """
+    query = select(BuildingElementUpload.id, BuildingElementUpload.latitude, BuildingElementUpload.longitude)
+    if building_element_upload_ids is not None:
+        query = query.where(BuildingElementUpload.id.in_(building_element_upload_ids))
+    rows = session.execute(query.order_by(BuildingElementUpload.id)).all()
+
+    type_pairs = set()
+    for column in (BuildingElement.material_type_id, BuildingElement.waste_code_type_id):
+        type_query = select(BuildingElement.building_element_upload_id, column).where(column.is_not(None)).distinct()
+        if building_element_upload_ids is not None:
+            type_query = type_query.where(BuildingElement.building_element_upload_id.in_(building_element_upload_ids))
+        type_pairs.update(tuple(row) for row in session.execute(type_query))
+
+    ids = [row[0] for row in rows]
+    latitudes = np.array([row[1] for row in rows], dtype=np.float64)
+    longitudes = np.array([row[2] for row in rows], dtype=np.float64)
+    return ids, latitudes, longitudes, type_pairs
+
+
+def load_partner_vectors(session, model, link_models, foreign_key_name):
+    """
+    Returns (ids, latitudes, longitudes, type pairs) of all collectors or contractors, where the type pairs are the
+    (partner id, unified type id) rows of the given link tables.
+    """
+    rows = session.execute(select(model.id, model.latitude, model.longitude).order_by(model.id)).all()
+
+    type_pairs = set()
+    for link_model in link_models:
+        type_query = select(getattr(link_model, foreign_key_name), link_model.unified_type_id)
+        type_pairs.update(tuple(row) for row in session.execute(type_query))
+
+    ids = [row[0] for row in rows]
+    latitudes = np.array([row[1] for row in rows], dtype=np.float64)
+    longitudes = np.array([row[2] for row in rows], dtype=np.float64)
+    return ids, latitudes, longitudes, type_pairs
+
+
+def unit_vectors(latitudes, longitudes):
+    """
+    Returns the (n, 3) unit vectors of the coordinates in degrees.
+    """
+    latitudes = np.radians(latitudes)
+    longitudes = np.radians(longitudes)
+    return np.stack(
+        [np.cos(latitudes) * np.cos(longitudes), np.cos(latitudes) * np.sin(longitudes), np.sin(latitudes)], axis=1
+    )
+
+
+def great_circle_matrix_km(vectors_a, vectors_b):
+    """
+    Returns the (len(a), len(b)) great-circle distance matrix in km between unit vectors.
+
+    Equivalent to the haversine formula, the chord length |a - b| = sqrt(2 - 2 a.b) is computed with a single matrix
+    product such that only one transcendental function is evaluated per pair.
+    """
+    # 2 - 2 a.b cancels for close points, it is computed in float64 and only the remaining steps in float32
+    squared_chords = vectors_a @ vectors_b.T
+    np.multiply(squared_chords, -2, out=squared_chords)
+    np.add(squared_chords, 2, out=squared_chords)
+    distances = squared_chords.astype(np.float32)
+    np.clip(distances, 0, 4, out=distances)
+    np.sqrt(distances, out=distances)
+    np.multiply(distances, 0.5, out=distances)
+    np.arcsin(distances, out=distances)
+    np.multiply(distances, 2 * EARTH_RADIUS_KM, out=distances)
+    return distances
+
+
+def score_matches(uploads, partners, top_k, distance_scale_km):
+    """
+    Scores every upload against every partner and returns, per upload, the top_k partners as
+    (upload id, [(partner id, score, distance km, compatibility)]) ordered by descending score.
+
+    The compatibility is the share of the upload's material and waste code types that the partner handles, or 1 if
+    the upload has none. The score is the compatibility damped by distance: compatibility / (1 + distance / scale).
+    Partners with a score of 0 are never returned.
+    """
+    upload_ids, upload_latitudes, upload_longitudes, upload_type_pairs = uploads
+    partner_ids, partner_latitudes, partner_longitudes, partner_type_pairs = partners
+    if not upload_ids:
+        return []
+    if not partner_ids:
+        return [(upload_id, []) for upload_id in upload_ids]
+
+    # only types used by at least one upload can contribute to the compatibility
+    type_index = {type_id: column for column, type_id in enumerate(sorted({pair[1] for pair in upload_type_pairs}))}
+    upload_types = _one_hot(upload_ids, upload_type_pairs, type_index)
+    partner_types_transposed = np.ascontiguousarray(_one_hot(partner_ids, partner_type_pairs, type_index).T)
+    upload_type_counts = upload_types.sum(axis=1)
+    partner_ids = np.array(partner_ids)
+    upload_vectors = unit_vectors(upload_latitudes, upload_longitudes)
+    partner_vectors = unit_vectors(partner_latitudes, partner_longitudes)
+    scale = np.float32(distance_scale_km)
+    k = min(top_k, len(partner_ids))
+
+    results = []
+    for start in range(0, len(upload_ids), SCORING_BATCH_SIZE):
+        end = start + SCORING_BATCH_SIZE
+        counts = upload_type_counts[start:end, None]
+        compatibilities = upload_types[start:end] @ partner_types_transposed
+        np.divide(compatibilities, np.maximum(counts, 1), out=compatibilities)
+        # uploads without any type are compatible with every partner
+        compatibilities[counts[:, 0] == 0] = 1
+        distances = great_circle_matrix_km(upload_vectors[start:end], partner_vectors)
+
+        scores = distances / scale
+        np.add(scores, 1, out=scores)
+        np.divide(compatibilities, scores, out=scores)
+
+        # unordered top k per row in O(partners), then order only the k candidates
+        candidates = np.argpartition(scores, len(partner_ids) - k, axis=1)[:, -k:]
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")
+        candidates = np.take_along_axis(candidates, order, axis=1)
+
+        for row, upload_id in enumerate(upload_ids[start:end]):
+            matches = [
+                (
+                    int(partner_ids[column]),
+                    float(scores[row, column]),
+                    float(distances[row, column]),
+                    float(compatibilities[row, column]),
+                )
+                for column in candidates[row]
+                if scores[row, column] > 0
+            ]
+            results.append((upload_id, matches))
+    return results
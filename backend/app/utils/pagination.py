@@ -0,0 +1,65 @@
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import BigInteger, Integer, String, TypeDecorator, func, select, tuple_
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode()
+
+
+def _is_column_value(value, column):
+    # a value the column's type cannot hold would fail in the database instead of with a 400
+    column_type = column.type.impl if isinstance(column.type, TypeDecorator) else column.type
+    if isinstance(column_type, Integer):
+        bits = 63 if isinstance(column_type, BigInteger) else 31
+        return isinstance(value, int) and not isinstance(value, bool) and -(2**bits) <= value < 2**bits
+    if isinstance(column_type, String):
+        return isinstance(value, str) and "\x00" not in value
+    return True
+
+
+def decode_cursor(cursor, sort_columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        values = None
+    if (
+        not isinstance(values, list)
+        or len(values) != len(sort_columns)
+        or not all(_is_column_value(value, column) for value, column in zip(values, sort_columns))
+    ):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid cursor <{cursor}>")
+    return values
+
+
+def apply_pagination(query, sort_columns, pagination):
+    """
+    Orders the query by the unique sort_columns and, if pagination is given, restricts it to the page after the
+    cursor. One extra row is fetched to know whether there is a next page, see `split_page`.
+    """
+    query = query.order_by(*sort_columns)
+    if not pagination:
+        return query
+    if pagination.cursor:
+        values = decode_cursor(pagination.cursor, sort_columns)
+        query = query.where(tuple_(*sort_columns) > tuple_(*values))
+    return query.limit(pagination.limit + 1)
+
+
+def split_page(rows, pagination, sort_key):
+    """
+    Returns the rows of the current page and the cursor of the next page, or None if this is the last page.
+    """
+    if not pagination or len(rows) <= pagination.limit:
+        return rows, None
+    rows = rows[: pagination.limit]
+    return rows, encode_cursor(sort_key(rows[-1]))
+
+
+def count_total(session, query, pagination):
+    if not pagination or not pagination.include_total:
+        return None
+    return session.execute(select(func.count()).select_from(query.order_by(None).subquery())).scalar_one()
@@ -0,0 +1,90 @@
+import time
+
+from app.config import settings
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+
+class _WaitTimeMixin:
+    """
+    Records how long checkouts wait for a free connection of the pool, including opening a new one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait_seconds = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def recreate(self):
+        # keep the statistics when the engine replaces the pool, e.g. after a disconnect
+        pool = super().recreate()
+        pool.checkouts, pool.wait_seconds, pool.max_wait_seconds = (
+            self.checkouts,
+            self.wait_seconds,
+            self.max_wait_seconds,
+        )
+        return pool
+
+
+class TimedQueuePool(_WaitTimeMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_WaitTimeMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(_WaitTimeMixin, NullPool):
+    pass
+
+
+def pool_options(connection_string, is_async=False):
+    """
+    Engine keyword arguments of the configured DB_POOL_MODE.
+
+    "queue" keeps up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections per process, "null" opens a connection per
+    checkout and is meant for serverless deployments behind an external pooler such as PgBouncer.
+    """
+    if settings.DB_POOL_MODE == "null":
+        options = {"poolclass": TimedNullPool}
+        if make_url(connection_string).get_driver_name() == "asyncpg":
+            # a transaction mode pooler hands out another server connection per transaction, on which the prepared
+            # statements cached by asyncpg and by the sqlalchemy dialect do not exist
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        return options
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def pool_stats(pool):
+    stats = {
+        "mode": settings.DB_POOL_MODE,
+        "checkouts": pool.checkouts,
+        "wait_seconds": round(pool.wait_seconds, 6),
+        "max_wait_seconds": round(pool.max_wait_seconds, 6),
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    return stats
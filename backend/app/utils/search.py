@@ -0,0 +1,142 @@
+from app.utils.database import ilike_contains
+from app.utils.facets import count_facets
+from app.utils.geo import location_filter
+from app.utils.pagination import apply_pagination, count_total, split_page
+from sqlalchemy import exists, select
+
+
+class TypeColumn:
+    """
+    A filter field on a foreign key column to unified_type, compiled to IN on the column itself.
+    """
+
+    def __init__(self, facet, column):
+        self.facet = facet
+        self.column = column
+
+    def filter(self, key_column, ids):
+        return self.column.in_(ids)
+
+    def facet_query(self, matches, key_column):
+        return select(matches.c[self.column.key])
+
+
+class TypeLink:
+    """
+    A filter field on a many-to-many link table, compiled to an EXISTS on the link table's primary key without
+    joining unified_type.
+    """
+
+    def __init__(self, facet, link_model, foreign_key_name):
+        self.facet = facet
+        self.link_model = link_model
+        self.foreign_key = getattr(link_model, foreign_key_name)
+
+    def filter(self, key_column, ids):
+        return exists().where(self.foreign_key == key_column, self.link_model.unified_type_id.in_(ids))
+
+    def facet_query(self, matches, key_column):
+        return select(self.link_model.unified_type_id).join(matches, matches.c[key_column.key] == self.foreign_key)
+
+
+def range_filter(column, number_range):
+    conditions = []
+    if number_range.min is not None:
+        conditions.append(column >= number_range.min)
+    if number_range.max is not None:
+        conditions.append(column <= number_range.max)
+    return conditions
+
+
+class SearchSpec:
+    """
+    Declares how the request of a search endpoint maps to SQL.
+
+    query selects the result rows, key_column identifies a result for facets and link tables, sort_columns are the
+    unique keyset pagination order and sort_key returns their values from a result row. type_fields, range_fields map
+    the request's filter field names to a TypeColumn or TypeLink, respectively to a numeric column.
+    """
+
+    def __init__(
+        self,
+        query,
+        key_column,
+        sort_columns,
+        sort_key,
+        text_column,
+        type_fields,
+        range_fields=None,
+        location_columns=None,
+    ):
+        self.query = query
+        self.key_column = key_column
+        self.sort_columns = sort_columns
+        self.sort_key = sort_key
+        self.text_column = text_column
+        self.type_fields = type_fields
+        self.range_fields = range_fields or {}
+        self.location_columns = location_columns
+
+    def link_models(self):
+        return {field.facet: field.link_model for field in self.type_fields.values() if isinstance(field, TypeLink)}
+
+    def filtered_query(self, request):
+        query = self.query
+        if request.query.text:
+            query = query.where(ilike_contains(self.text_column, request.query.text))
+
+        for name, field in self.type_fields.items():
+            ids = getattr(request.filter, name)
+            if ids:
+                query = query.where(field.filter(self.key_column, ids))
+
+        for name, column in self.range_fields.items():
+            number_range = getattr(request.filter, name)
+            if number_range:
+                query = query.where(*range_filter(column, number_range))
+
+        if self.location_columns and request.filter.location:
+            query = query.where(location_filter(*self.location_columns, request.filter.location))
+        return query
+
+    def facets(self, session, query):
+        type_columns = [field.column for field in self.type_fields.values() if isinstance(field, TypeColumn)]
+        matches = query.with_only_columns(self.key_column, *type_columns).cte("matches")
+        return count_facets(
+            session,
+            {field.facet: field.facet_query(matches, self.key_column) for field in self.type_fields.values()},
+        )
+
+
+def run_search(session, spec, request):
+    """
+    Runs the search request of an endpoint declared by spec and returns (rows, next_cursor, total, facets), where
+    rows are the result rows of the requested page and total and facets are None unless requested.
+    """
+    query = spec.filtered_query(request)
+    facets = spec.facets(session, query) if request.include_facets else None
+    total = count_total(session, query, request.pagination)
+    query = apply_pagination(query, spec.sort_columns, request.pagination)
+    rows, next_cursor = split_page(session.execute(query).all(), request.pagination, spec.sort_key)
+    return rows, next_cursor, total, facets
+
+
+def search_response(results, next_cursor, total, facets):
+    # SearchResponse as plain data, encoded with ORJSONResponse instead of being validated against the response model
+    return {"results": results, "next_cursor": next_cursor, "total": total, "facets": facets}
+
+
+def partner_results(rows, fields, link_attributes, type_labels):
+    """
+    Returns collector or contractor results in the shape of their Read schema from rows of (*fields, id) and the
+    labels of read_linked_type_labels.
+    """
+    results = []
+    for *values, id in rows:
+        result = dict(zip(fields, values))
+        labels = type_labels.get(id, {})
+        for attribute in link_attributes:
+            result[attribute] = labels.get(attribute, [])
+        result["id"] = id
+        results.append(result)
+    return results
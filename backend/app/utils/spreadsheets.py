@@ -0,0 +1,159 @@
+import csv
+import io
+import re
+
+from app.types import BuildingElementWorksheetType, get_unified_types
+
+# header labels of the Rondas inventory workbook, keep in sync with frontend/pages/building-elements/items/upload.tsx
+FIRST_HEADER_ROW_COLUMNS = {
+    "reference": "Référence",
+    "title": "DESIGNATION",
+    "unit_type": "Unité",
+}
+SECOND_HEADER_ROW_COLUMNS = {
+    "total": "total",
+    "total_mass_kg": "Masse totale estimée in kg",
+    "total_volume_m3": "volume total en m3",
+    "material_type": "matériaux",
+    "health_status_type": "état sanitaire des matériaux",
+    "reuse_potential_type": "potentiel de réemploi/ réutilisation",
+    "waste_code_type": "code déchet",
+    "recycling_potential_type": "potentiel de recyclage",
+    "has_energy_recovery": "valorisation énergie",
+    "has_elimination": "élimination",
+    "circular_service_needed": "service nécessaire",
+}
+NUMBER_PRECISIONS = {
+    "total": 4,
+    "total_mass_kg": 2,
+    "total_volume_m3": 2,
+}
+SUMMARY_SHEET_NAME = "synthese"
+# a number with a decimal comma such as "1,5", thousands separators are not supported
+DECIMAL_COMMA_NUMBER = re.compile(r"[+-]?\d+,\d+")
+
+
+def postprocess_value(value):
+    if isinstance(value, str):
+        value = value.replace("\u00A0", " ").replace("m2", "m²").replace("m3", "m³").strip()
+        if not value:
+            return None
+    return value
+
+
+def round_number(value, precision):
+    if value is None:
+        return None
+    try:
+        return round(float(value), precision)
+    except (TypeError, ValueError):
+        return value
+
+
+def postprocess_building_element(data):
+    data = {key: postprocess_value(value) for key, value in data.items()}
+    for key, precision in NUMBER_PRECISIONS.items():
+        data[key] = round_number(data.get(key), precision)
+    return data
+
+
+def normalize_decimal_comma(value):
+    if isinstance(value, str) and DECIMAL_COMMA_NUMBER.fullmatch(value.strip()):
+        return value.strip().replace(",", ".")
+    return value
+
+
+def _find_column_index(row, target):
+    for index, column in enumerate(row):
+        if isinstance(column, str) and target in column:
+            return index
+    return None
+
+
+def _trim_row(row):
+    # empty trailing cells are not part of the row, same as in the browser parser
+    end = len(row)
+    while end > 0 and row[end - 1] in (None, ""):
+        end -= 1
+    return row[:end]
+
+
+def open_workbook(file):
+    # imported on first upload, openpyxl and its numpy import are the largest part of the cold start otherwise
+    from openpyxl import load_workbook
+
+    return load_workbook(file, read_only=True, data_only=True)
+
+
+def read_workbook_location(workbook):
+    """
+    Returns (address, latitude, longitude) from the summary sheet, or None if it is missing or malformed.
+    """
+    if SUMMARY_SHEET_NAME not in workbook.sheetnames:
+        return None
+    rows = workbook[SUMMARY_SHEET_NAME].iter_rows(min_row=1, max_row=2, max_col=2, values_only=True)
+    try:
+        (_, address), (_, location) = rows
+        latitude, longitude = (float(coordinate) for coordinate in location.split(","))
+    except (TypeError, ValueError, AttributeError):
+        return None
+    return address, latitude, longitude
+
+
+def iter_workbook_building_elements(workbook):
+    """
+    Yields (location, data) per building element row of the supported worksheets without loading whole sheets.
+    """
+    worksheet_names = [unified_type["type_label"] for unified_type in get_unified_types([BuildingElementWorksheetType])]
+    for sheet_name in workbook.sheetnames:
+        if sheet_name not in worksheet_names:
+            continue
+
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        first_row = next(rows, ())
+        second_row = next(rows, ())
+        column_indices = {
+            **{field: _find_column_index(first_row, target) for field, target in FIRST_HEADER_ROW_COLUMNS.items()},
+            **{field: _find_column_index(second_row, target) for field, target in SECOND_HEADER_ROW_COLUMNS.items()},
+        }
+
+        category = None
+        for row_number, row in enumerate(rows, start=3):
+            row = _trim_row(row)
+            if len(row) < 2:
+                continue
+            if len(row) == 2:
+                category = row[1]
+                continue
+            if not category:
+                continue
+
+            data = {
+                field: row[index] if index is not None and index < len(row) else None
+                for field, index in column_indices.items()
+            }
+            yield f"sheet <{sheet_name}> row <{row_number}>", postprocess_building_element(
+                {"worksheet_type": sheet_name, "category": category, **data}
+            )
+
+
+def iter_csv_building_elements(file):
+    """
+    Yields (location, data) per row of a csv file whose header uses the BuildingElementBase field names. Numbers of
+    ';' delimited files may use a decimal comma, as written by spreadsheet applications in French locales.
+    """
+    lines = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    sample = lines.read(4096)
+    lines.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.DictReader(lines, dialect=dialect)
+    for row_number, row in enumerate(reader, start=2):
+        data = {key.strip(): value for key, value in row.items() if key}
+        if dialect.delimiter == ";":
+            for key in NUMBER_PRECISIONS.keys() & data.keys():
+                data[key] = normalize_decimal_comma(data[key])
+        yield f"row <{row_number}>", postprocess_building_element(data)
@@ -0,0 +1,36 @@
+import argparse
+import time
+
+from app.main import app
+from benchmarks.data import partners
+from fastapi.testclient import TestClient
+
+COUNT = 10000
+RUNS = 3
+
+
+def time_create(client, partner_type, payloads):
+    started = time.perf_counter()
+    response = client.post(f"/api/{partner_type}s/", json=payloads)
+    elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    return elapsed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Times POST /api/collectors/ and /api/contractors/ with one batch of partners against the "
+        "database of POSTGRES_CONNECTION_STRING. Every run adds the partners, use a throwaway database."
+    )
+    parser.add_argument("--count", type=int, default=COUNT, help="partners per request")
+    parser.add_argument("--runs", type=int, default=RUNS, help="requests per partner type, the best one is reported")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with TestClient(app) as client:
+        for partner_type in ["collector", "contractor"]:
+            payloads = partners(partner_type, args.count)
+            elapsed = min(time_create(client, partner_type, payloads) for _ in range(args.runs))
+            print(f"{args.count} {partner_type}s: {elapsed:.2f} s, {args.count / elapsed:.0f} {partner_type}s/s")
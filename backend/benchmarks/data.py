@@ -0,0 +1,94 @@
+import random
+
+from app.types import (
+    AuthorizedVehicleType,
+    BuildingElementUnitType,
+    BuildingElementWorksheetType,
+    CircularServiceType,
+    CircularStrategyType,
+    HealthStatusType,
+    MaterialType,
+    RecyclingPotentialType,
+    ReusePotentialType,
+    WasteCodeType,
+    get_unified_types,
+)
+
+# the same payloads on every run
+SEED = 42
+
+
+def type_labels(type_class):
+    return [unified_type["type_label"] for unified_type in get_unified_types([type_class])]
+
+
+def building_element(rng, index):
+    # in the shape of BuildingElementCreate
+    return {
+        "worksheet_type": rng.choice(type_labels(BuildingElementWorksheetType)),
+        "category": rng.choice(["Walls", "Floors", "Roofs", "Openings", "Networks"]),
+        "reference": f"R{index}",
+        "title": f"{rng.choice(['Beam', 'Door', 'Window', 'Tile', 'Pipe'])} {index}",
+        "unit_type": rng.choice(type_labels(BuildingElementUnitType)),
+        "total": rng.randint(1, 100),
+        "total_mass_kg": round(rng.uniform(1, 1000), 2),
+        "total_volume_m3": round(rng.uniform(0.1, 10), 2),
+        "material_type": rng.choice(type_labels(MaterialType)),
+        "health_status_type": rng.choice(type_labels(HealthStatusType)),
+        "reuse_potential_type": rng.choice(type_labels(ReusePotentialType)),
+        "waste_code_type": rng.choice(type_labels(WasteCodeType)),
+        "recycling_potential_type": rng.choice(type_labels(RecyclingPotentialType)),
+        "has_energy_recovery": rng.random() < 0.5,
+        "has_elimination": rng.random() < 0.5,
+        "circular_service_needed": rng.choice(type_labels(CircularServiceType)),
+    }
+
+
+def building_element_upload(count, seed=SEED):
+    """
+    Returns a BuildingElementUploadCreate payload with count building elements of random types.
+    """
+    rng = random.Random(seed)
+    return {
+        "address": "1 Rue de Rivoli, 75001 Paris",
+        "latitude": 48.86,
+        "longitude": 2.35,
+        "building_elements": [building_element(rng, index) for index in range(count)],
+    }
+
+
+def partners(partner_type, count, seed=SEED, start=0):
+    """
+    Returns count CollectorCreate or ContractorCreate payloads around Paris with random types, numbered from start.
+    """
+    rng = random.Random(seed)
+    if partner_type == "collector":
+        type_collections = {
+            "material_types": MaterialType,
+            "waste_code_types": WasteCodeType,
+            "authorized_vehicle_types": AuthorizedVehicleType,
+            "circular_strategy_types": CircularStrategyType,
+        }
+    else:
+        type_collections = {
+            "material_types": MaterialType,
+            "waste_code_types": WasteCodeType,
+            "circular_service_types": CircularServiceType,
+        }
+    return [
+        {
+            "name": f"{partner_type.title()} {index}",
+            "address": f"{index} Rue de Rivoli",
+            "zip_code": "75001",
+            "city": "Paris",
+            "latitude": round(rng.uniform(48.7, 49.0), 6),
+            "longitude": round(rng.uniform(2.2, 2.5), 6),
+            "email": f"{partner_type}{index}@example.com",
+            "phone": None,
+            **{
+                attribute: rng.sample(type_labels(type_class), rng.randint(1, 3))
+                for attribute, type_class in type_collections.items()
+            },
+        }
+        for index in range(start, start + count)
+    ]
@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+import httpx
+
+CLIENTS = 200
+DURATION_SECONDS = 30
+TIMEOUT = 30
+
+COLLECTOR_FILTER = {
+    "material_type_ids": [],
+    "waste_code_type_ids": [],
+    "authorized_vehicle_type_ids": [],
+    "circular_strategy_type_ids": [],
+}
+CONTRACTOR_FILTER = {"material_type_ids": [], "waste_code_type_ids": [], "circular_service_type_ids": []}
+BUILDING_ELEMENT_FILTER = {
+    "worksheet_type_ids": [],
+    "unit_type_ids": [],
+    "material_type_ids": [],
+    "health_status_type_ids": [],
+    "reuse_potential_type_ids": [],
+    "waste_code_type_ids": [],
+    "recycling_potential_type_ids": [],
+    "circular_service_needed_type_ids": [],
+}
+PAGINATION = {"limit": 50}
+
+# (name, method, path, body) of the async endpoints, picked at random by every client
+REQUESTS = [
+    ("collector filter", "GET", "/api/collectors/filter/", None),
+    ("contractor filter", "GET", "/api/contractors/filter/", None),
+    ("building element filter", "GET", "/api/building-elements/filter/", None),
+    (
+        "collector search",
+        "POST",
+        "/api/collectors/search",
+        {"query": {"text": ""}, "filter": COLLECTOR_FILTER, "pagination": PAGINATION},
+    ),
+    (
+        "contractor search",
+        "POST",
+        "/api/contractors/search",
+        {"query": {"text": ""}, "filter": CONTRACTOR_FILTER, "pagination": PAGINATION},
+    ),
+    (
+        "building element search",
+        "POST",
+        "/api/building-elements/search/",
+        {"query": {"text": ""}, "filter": BUILDING_ELEMENT_FILTER, "pagination": PAGINATION},
+    ),
+    (
+        "matches search",
+        "POST",
+        "/api/matches/search/",
+        {
+            "query": {"text": ""},
+            "filter": {
+                "building_element": BUILDING_ELEMENT_FILTER,
+                "collector": COLLECTOR_FILTER,
+                "contractor": CONTRACTOR_FILTER,
+            },
+            "pagination": {"building_element": PAGINATION, "collector": PAGINATION, "contractor": PAGINATION},
+        },
+    ),
+]
+
+
+class LoadStats:
+    def __init__(self):
+        # name -> latencies in seconds of the successful requests
+        self.latencies = {name: [] for name, *_ in REQUESTS}
+        self.errors = {}
+
+    def record_error(self, name, error):
+        key = f"{name}: {error}"
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+    def summary(self, elapsed):
+        all_latencies = [latency for latencies in self.latencies.values() for latency in latencies]
+        lines = [
+            latency_summary(name, latencies, elapsed)
+            for name, latencies in [("all", all_latencies), *self.latencies.items()]
+            if latencies
+        ]
+        lines.extend(f"{count} failed, {error}" for error, count in self.errors.items())
+        return "\n".join(lines)
+
+
+def latency_summary(name, latencies, elapsed):
+    latencies = sorted(latencies)
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000
+
+    return (
+        f"{name}: {len(latencies)} requests, {len(latencies) / elapsed:.0f} requests/s, "
+        f"p50 {percentile(50):.0f} ms p95 {percentile(95):.0f} ms p99 {percentile(99):.0f} ms "
+        f"max {latencies[-1] * 1000:.0f} ms"
+    )
+
+
+async def run_client(client, stats, deadline):
+    while time.perf_counter() < deadline:
+        name, method, path, body = random.choice(REQUESTS)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body)
+        except httpx.HTTPError as exception:
+            stats.record_error(name, type(exception).__name__)
+            continue
+        if response.status_code != 200:
+            stats.record_error(name, f"status <{response.status_code}>")
+            continue
+        stats.latencies[name].append(time.perf_counter() - started)
+
+
+async def run_load(backend_url, clients, duration_seconds, timeout):
+    """
+    Runs clients concurrent clients, each sending one request after the other for duration_seconds, and returns the
+    stats and the elapsed seconds.
+    """
+    stats = LoadStats()
+    # one connection per client such that requests only queue in the backend
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=backend_url, limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        deadline = started + duration_seconds
+        await asyncio.gather(*(run_client(client, stats, deadline) for _ in range(clients)))
+    return stats, time.perf_counter() - started
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Sends the search and filter requests of many concurrent clients to a running backend."
+    )
+    parser.add_argument(
+        "--backend-url",
+        default=os.getenv("NEXT_PUBLIC_BACKEND_URL"),
+        help="backend to load, defaults to NEXT_PUBLIC_BACKEND_URL",
+    )
+    parser.add_argument(
+        "--baseline-url",
+        help="second backend on the same database started with DB_SEARCH_SESSIONS=sync, loaded after the first one "
+        "to compare the async endpoints to the sync sessions on the threadpool",
+    )
+    parser.add_argument("--clients", type=int, default=CLIENTS, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=DURATION_SECONDS, help="seconds to send requests")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="timeout of a request in seconds")
+    args = parser.parse_args()
+    if not args.backend_url:
+        parser.error("--backend-url or NEXT_PUBLIC_BACKEND_URL is required")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    runs = [("backend", args.backend_url)]
+    if args.baseline_url:
+        runs.append(("baseline", args.baseline_url))
+    failed = False
+    for name, backend_url in runs:
+        stats, elapsed = asyncio.run(run_load(backend_url.rstrip("/"), args.clients, args.duration, args.timeout))
+        if args.baseline_url:
+            print(f"{name} {backend_url}")
+        print(stats.summary(elapsed))
+        failed = failed or bool(stats.errors)
+    sys.exit(1 if failed else 0)
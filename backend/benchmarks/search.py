@@ -0,0 +1,187 @@
+import argparse
+import time
+
+from app.api.building_elements import search_building_elements
+from app.api.collectors import search_collectors
+from app.api.contractors import search_contractors
+from app.main import app
+from app.schemas.building_element_schema import (
+    BuildingElementSearchRequest,
+    BuildingElementUploadRead,
+)
+from app.schemas.collector_schema import CollectorRead, CollectorSearchRequest
+from app.schemas.contractor_schema import ContractorRead, ContractorSearchRequest
+from app.schemas.search_schema import SearchResponse
+from app.utils.database import SessionLocal
+from benchmarks.data import SEED, building_element_upload, partners
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+
+RUNS = 5
+ELEMENTS_PER_UPLOAD = 50
+
+BUILDING_ELEMENT_FILTER = {
+    "worksheet_type_ids": [],
+    "unit_type_ids": [],
+    "material_type_ids": [],
+    "health_status_type_ids": [],
+    "reuse_potential_type_ids": [],
+    "waste_code_type_ids": [],
+    "recycling_potential_type_ids": [],
+    "circular_service_needed_type_ids": [],
+}
+COLLECTOR_FILTER = {
+    "material_type_ids": [],
+    "waste_code_type_ids": [],
+    "authorized_vehicle_type_ids": [],
+    "circular_strategy_type_ids": [],
+}
+CONTRACTOR_FILTER = {"material_type_ids": [], "waste_code_type_ids": [], "circular_service_type_ids": []}
+
+
+def count_building_elements(results):
+    return sum(len(upload["building_elements"]) for upload in results)
+
+
+def seed_building_elements(client, start, stop, elements_per_upload):
+    # one request per upload, as the uploads of the frontend
+    for index in range(start, stop):
+        payload = building_element_upload(elements_per_upload, seed=SEED + index)
+        client.post("/api/building-elements/", json=payload).raise_for_status()
+
+
+def seed_partners(partner_type):
+    def seed(client, start, stop, _):
+        payloads = partners(partner_type, stop - start, seed=SEED + start, start=start)
+        client.post(f"/api/{partner_type}s/", json=payloads).raise_for_status()
+
+    return seed
+
+
+# endpoint -> (search path, filter, seed(client, start, stop, elements per upload), unit of the sizes, rows of results)
+SEARCHES = {
+    "building-elements": (
+        "/api/building-elements/search/",
+        BUILDING_ELEMENT_FILTER,
+        seed_building_elements,
+        "uploads",
+        count_building_elements,
+    ),
+    "collectors": ("/api/collectors/search", COLLECTOR_FILTER, seed_partners("collector"), "collectors", len),
+    "contractors": ("/api/contractors/search", CONTRACTOR_FILTER, seed_partners("contractor"), "contractors", len),
+}
+
+# endpoint -> (search function, request model, Read model of a result)
+SERIALIZATIONS = {
+    "building-elements": (search_building_elements, BuildingElementSearchRequest, BuildingElementUploadRead),
+    "collectors": (search_collectors, CollectorSearchRequest, CollectorRead),
+    "contractors": (search_contractors, ContractorSearchRequest, ContractorRead),
+}
+
+
+def time_search(client, path, filter, count_rows):
+    # without pagination every matching row is returned
+    started = time.perf_counter()
+    response = client.post(path, json={"query": {"text": ""}, "filter": filter})
+    elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    return elapsed, count_rows(response.json()["results"])
+
+
+def serialize_with_orjson(content, _):
+    # as the search endpoints
+    return ORJSONResponse(content).body
+
+
+def serialize_with_read_models(content, read_model):
+    # as the search endpoints with a response model did: Read models, the returned SearchResponse as dict validated
+    # again against the response model and encoded by jsonable_encoder and JSONResponse
+    response = SearchResponse[read_model](
+        results=[read_model.parse_obj(result) for result in content["results"]],
+        next_cursor=content["next_cursor"],
+        total=content["total"],
+        facets=content["facets"],
+    )
+    validated = SearchResponse.parse_obj(response.dict())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def time_serializations(endpoint, filter, count_rows, runs):
+    """
+    Reads the results of the search once and returns (rows, best seconds with orjson, best seconds through the Read
+    models), only the serialization is timed.
+    """
+    search, request_model, read_model = SERIALIZATIONS[endpoint]
+    with SessionLocal() as session:
+        content = search(session, request_model.parse_obj({"query": {"text": ""}, "filter": filter}))
+
+    def best(serialize):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            serialize(content, read_model)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    return count_rows(content["results"]), best(serialize_with_orjson), best(serialize_with_read_models)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Times unpaginated searches end to end against the database of POSTGRES_CONNECTION_STRING and "
+        "reports the time per result row."
+    )
+    parser.add_argument("--endpoints", nargs="+", choices=SEARCHES, default=list(SEARCHES), help="searches to time")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[],
+        help="increasing numbers of uploads, collectors or contractors to create before each timing, without sizes "
+        "the existing rows are searched, use a throwaway database",
+    )
+    parser.add_argument(
+        "--elements-per-upload", type=int, default=ELEMENTS_PER_UPLOAD, help="building elements of each created upload"
+    )
+    parser.add_argument(
+        "--serialization",
+        action="store_true",
+        help="time only the serialization of the results, as plain dicts with orjson and through the Read models",
+    )
+    parser.add_argument("--runs", type=int, default=RUNS, help="searches per size, the best one is reported")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with TestClient(app) as client:
+        for endpoint in args.endpoints:
+            search_path, filter, seed, unit, count_rows = SEARCHES[endpoint]
+            created = 0
+            for size in args.sizes or [None]:
+                label = endpoint
+                if size is not None:
+                    seed(client, created, size, args.elements_per_upload)
+                    created = max(created, size)
+                    label = f"{endpoint} of {size} {unit}"
+
+                if args.serialization:
+                    rows, orjson_elapsed, read_models_elapsed = time_serializations(
+                        endpoint, filter, count_rows, args.runs
+                    )
+                    print(
+                        f"{label}: {rows} rows serialized in {orjson_elapsed * 1000:.0f} ms with orjson, "
+                        f"{orjson_elapsed / max(rows, 1) * 1_000_000:.1f} us per row, and in "
+                        f"{read_models_elapsed * 1000:.0f} ms through the Read models, "
+                        f"{read_models_elapsed / max(rows, 1) * 1_000_000:.1f} us per row"
+                    )
+                    continue
+
+                runs = [time_search(client, search_path, filter, count_rows) for _ in range(args.runs)]
+                elapsed = min(elapsed for elapsed, _ in runs)
+                rows = runs[0][1]
+                print(
+                    f"{label}: {rows} rows in {elapsed * 1000:.0f} ms, "
+                    f"{elapsed / max(rows, 1) * 1_000_000:.0f} us per row"
+                )
@@ -0,0 +1,81 @@
+import argparse
+import json
+import subprocess
+import sys
+
+# budgets of a cold start on a developer machine, in seconds
+IMPORT_BUDGET_SECONDS = 1.0
+FIRST_REQUEST_BUDGET_SECONDS = 0.1
+# import, startup handlers and first request, the startup handlers run before the first request is served
+COLD_START_BUDGET_SECONDS = 1.2
+RUNS = 3
+
+# runs in a fresh interpreter such that nothing is imported or cached yet
+COLD_START = """
+import json
+import time
+
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+
+client = TestClient(app.main.app)
+entered = time.perf_counter()
+with client:
+    # the startup handlers ran when entering the client
+    started_up = time.perf_counter()
+    response = client.get("/api/collectors/filter/")
+    first_request = time.perf_counter()
+    response.raise_for_status()
+
+print(json.dumps({
+    "import": imported - started,
+    "startup": started_up - entered,
+    "first request": first_request - started_up,
+    "cold start": imported - started + first_request - entered,
+}))
+"""
+
+
+def measure_cold_start():
+    output = subprocess.run([sys.executable, "-c", COLD_START], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Times importing app.main and its first request against the database of "
+        "POSTGRES_CONNECTION_STRING in fresh interpreters and fails if the best run exceeds the budgets."
+    )
+    parser.add_argument("--runs", type=int, default=RUNS, help="cold starts to measure")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_SECONDS, help="seconds to import")
+    parser.add_argument(
+        "--first-request-budget", type=float, default=FIRST_REQUEST_BUDGET_SECONDS, help="seconds of the first request"
+    )
+    parser.add_argument(
+        "--cold-start-budget", type=float, default=COLD_START_BUDGET_SECONDS, help="seconds of the whole cold start"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    runs = [measure_cold_start() for _ in range(args.runs)]
+    # the best run is the least disturbed by the rest of the machine
+    best = {step: min(run[step] for run in runs) for step in runs[0]}
+    print(", ".join(f"{step} {seconds * 1000:.0f} ms" for step, seconds in best.items()))
+
+    exceeded = [
+        f"{step} took {best[step]:.3f} s, budget {budget:.3f} s"
+        for step, budget in [
+            ("import", args.import_budget),
+            ("first request", args.first_request_budget),
+            ("cold start", args.cold_start_budget),
+        ]
+        if best[step] > budget
+    ]
+    for message in exceeded:
+        print(message, file=sys.stderr)
+    sys.exit(1 if exceeded else 0)
@@ -0,0 +1,150 @@
+import argparse
+import json
+
+from app.models.building_element_model import BuildingElement, BuildingElementUpload
+from app.models.collector_model import Collector
+from app.models.contractor_model import Contractor
+from app.models.unified_type_model import UnifiedType
+from app.types import BuildingElementUnitType, BuildingElementWorksheetType
+from app.utils.database import engine, ilike_contains
+from sqlalchemy import ARRAY, Integer, bindparam, func, insert, literal, select, text
+
+# pg_trgm needs at least 3 characters to narrow a search down with the trigram indexes, shorter texts scan the tables
+TEXT = "123"
+TRIGRAM_LENGTH = 3
+ELEMENTS_PER_UPLOAD = 50
+TITLES = "Beam Door Window Tile Pipe"
+
+# searched columns with their trigram index, see the trigram search indexes migration
+COLUMNS = [
+    (BuildingElement.title, "ix_building_element_title_trgm"),
+    (Collector.name, "ix_collector_name_trgm"),
+    (Contractor.name, "ix_contractor_name_trgm"),
+]
+
+
+def first_type_id(type_class):
+    return (
+        select(UnifiedType.id)
+        .where(UnifiedType.discriminator == type_class.DISCRIMINATOR)
+        .order_by(UnifiedType.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def seed_building_elements(connection, start, stop):
+    """
+    Inserts the building elements start to stop in uploads of ELEMENTS_PER_UPLOAD with titles such as "Door 123". The
+    rows are generated by the database, creating a million of them through the API would take a long time.
+    """
+    uploads = -(-(stop - start) // ELEMENTS_PER_UPLOAD)
+    upload_ids = sorted(
+        connection.execute(
+            insert(BuildingElementUpload.__table__)
+            .from_select(
+                ["address", "latitude", "longitude"],
+                select(literal("1 Rue de Rivoli, 75001 Paris"), literal(48.86), literal(2.35)).select_from(
+                    func.generate_series(1, uploads)
+                ),
+            )
+            .returning(BuildingElementUpload.id)
+        ).scalars()
+    )
+    index = func.generate_series(start, stop - 1).table_valued("index").render_derived()
+    upload = (
+        func.unnest(bindparam("upload_ids", upload_ids, type_=ARRAY(Integer)))
+        .table_valued("id", with_ordinality="ordinality")
+        .render_derived()
+    )
+    rows = select(
+        literal("Walls"),
+        func.concat("R", index.c.index),
+        func.concat(func.split_part(TITLES, " ", index.c.index % 5 + 1), " ", index.c.index),
+        upload.c.id,
+        first_type_id(BuildingElementWorksheetType),
+        first_type_id(BuildingElementUnitType),
+    ).join_from(index, upload, upload.c.ordinality == (index.c.index - start) / ELEMENTS_PER_UPLOAD + 1)
+    connection.execute(
+        insert(BuildingElement.__table__).from_select(
+            ["category", "reference", "title", "building_element_upload_id", "worksheet_type_id", "unit_type_id"], rows
+        )
+    )
+    connection.commit()
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(connection, column, search_text):
+    """
+    Runs the text filter of the searches on column with EXPLAIN ANALYZE and returns (execution ms, matching rows,
+    scanned indexes).
+    """
+    query = select(column.table.c.id).where(ilike_contains(column, search_text))
+    compiled = query.compile(engine, compile_kwargs={"literal_binds": True})
+    [[[result]]] = connection.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {compiled}")).all()
+    result = json.loads(result) if isinstance(result, str) else result
+    nodes = list(plan_nodes(result["Plan"]))
+    indexes = {node["Index Name"] for node in nodes if "Index Name" in node}
+    return result["Execution Time"], result["Plan"]["Actual Rows"], indexes
+
+
+def explain_without_index(connection, column, search_text):
+    # the trigram indexes are only read by bitmap scans, without them the planner falls back to a sequential scan
+    connection.execute(text("SET LOCAL enable_bitmapscan = off"))
+    try:
+        return explain(connection, column, search_text)
+    finally:
+        connection.rollback()
+
+
+def report(connection, search_text):
+    # the planner prefers a sequential scan on small or unanalyzed tables
+    connection.execute(text("ANALYZE building_element, collector, contractor"))
+    connection.commit()
+    for column, index in COLUMNS:
+        milliseconds, rows, indexes = explain(connection, column, search_text)
+        scan_milliseconds, _, _ = explain_without_index(connection, column, search_text)
+        print(
+            f"{column.table.name}.{column.key} ILIKE '%{search_text}%': {rows} rows in {milliseconds:.1f} ms "
+            f"{'with' if index in indexes else 'without'} {index}, {scan_milliseconds:.1f} ms with a sequential scan"
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Explains the text filter of the searches against the database of POSTGRES_CONNECTION_STRING "
+        "and compares the plans with the trigram indexes to sequential scans."
+    )
+    parser.add_argument(
+        "--text", default=TEXT, help=f"searched text, texts of fewer than {TRIGRAM_LENGTH} characters scan the tables"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[],
+        help="increasing numbers of building elements to create before each report, e.g. 10000 100000 1000000, "
+        "without sizes the existing rows are searched, use a throwaway database",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with engine.connect() as connection:
+        if not connection.execute(text("SELECT FROM pg_extension WHERE extname = 'pg_trgm'")).first():
+            print("pg_trgm is not installed, the searches scan the tables")
+        if len(args.text) < TRIGRAM_LENGTH:
+            print(f"'{args.text}' has no trigram, the trigram indexes cannot narrow the search down")
+        created = 0
+        for size in args.sizes or [None]:
+            if size is not None:
+                seed_building_elements(connection, created, size)
+                created = max(created, size)
+                print(f"{size} building elements")
+            report(connection, args.text)
@@ -0,0 +1,36 @@
+import argparse
+import time
+
+from app.main import app
+from benchmarks.data import building_element_upload
+from fastapi.testclient import TestClient
+
+SIZES = [1000, 10000, 100000]
+RUNS = 3
+
+
+def time_upload(client, payload):
+    started = time.perf_counter()
+    response = client.post("/api/building-elements/", json=payload)
+    elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    return elapsed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Times POST /api/building-elements/ with uploads of increasing size against the database of "
+        "POSTGRES_CONNECTION_STRING. Every run adds an upload, use a throwaway database."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="building elements per upload")
+    parser.add_argument("--runs", type=int, default=RUNS, help="uploads per size, the best one is reported")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with TestClient(app) as client:
+        for size in args.sizes:
+            payload = building_element_upload(size)
+            elapsed = min(time_upload(client, payload) for _ in range(args.runs))
+            print(f"{size} building elements: {elapsed:.2f} s, {size / elapsed:.0f} building elements/s")
@@ -1,9 +1,16 @@
+import argparse
 import json
 import os
 import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import requests
-from app.schemas.collector_schema import CollectorCreate
+import urllib3
 from app.types import (
     AuthorizedVehicleType,
     CircularStrategyType,
@@ -18,24 +25,110 @@ BASEDIR = os.path.abspath(os.path.dirname(__file__))
 # load environment variables
 load_dotenv(os.path.join(BASEDIR, "../.env"))
 
+VALOBAT_PAGES = list(range(1, 15))
+BATCH_SIZE = 100
+CONCURRENCY = 4
+RETRIES = 5
+TIMEOUT = 60
+BACKOFF_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30
+# the backend did not write the request and it can be sent again. 502 and 504 come from a gateway that gave up while
+# the backend may still commit the chunk, e.g. on a Vercel function timeout, they are not retried
+RETRY_STATUS_CODES = {429, 500, 503}
+READ_CHUNK_SIZE = 64 * 1024
+FEATURES_ARRAY_START = re.compile(r'"features"\s*:\s*\[')
+FEATURE_SEPARATORS = " \t\r\n,"
 
-def request_backend(method, endpoint, data=None, timeout=None):
-    BACKEND_URL = os.getenv("NEXT_PUBLIC_BACKEND_URL")
-    url = f"{BACKEND_URL}{endpoint}"
-    headers = {"Content-Type": "application/json"}
 
-    if method == "GET":
-        resp = requests.get(url, headers=headers, timeout=timeout)
-    elif method == "POST":
-        resp = requests.post(url, data=json.dumps(data), headers=headers, timeout=timeout)
-    elif method == "PUT":
-        resp = requests.put(url, data=json.dumps(data), headers=headers, timeout=timeout)
-    elif method == "DELETE":
-        resp = requests.delete(url, data=json.dumps(data), headers=headers, timeout=timeout)
-    else:
-        raise ValueError(f"Invalid HTTP method: {method}")
+class UploadStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.collectors = 0
+        self.chunks = 0
+        self.failed_chunks = 0
+        self.failed_collectors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.latencies = []
+
+    def record(self, collectors, size, latency, retries, ok):
+        with self._lock:
+            self.retries += retries
+            self.latencies.append(latency)
+            if ok:
+                self.chunks += 1
+                self.collectors += collectors
+                self.bytes += size
+            else:
+                self.failed_chunks += 1
+                self.failed_collectors += collectors
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        latencies = sorted(self.latencies) or [0]
+        return (
+            f"uploaded {self.collectors} collectors in {self.chunks} requests, {self.bytes / 1e6:.1f} MB in "
+            f"{elapsed:.1f} s: {self.collectors / elapsed:.0f} collectors/s, {self.bytes / 1e6 / elapsed:.2f} MB/s, "
+            f"request latency p50 {latencies[len(latencies) // 2]:.2f} s p95 "
+            f"{latencies[int(len(latencies) * 0.95)]:.2f} s max {latencies[-1]:.2f} s, {self.retries} retries, "
+            f"{self.failed_chunks} failed requests with {self.failed_collectors} collectors"
+        )
+
+
+def create_http_session(concurrency):
+    # keeps one connection per worker open instead of connecting for every request
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Content-Type"] = "application/json"
+    return session
+
+
+def backoff_seconds(attempt):
+    # exponential backoff with full jitter such that retrying workers do not hit the backend at the same time
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * 2**attempt))
+
+
+def is_connect_failure(exception):
+    """
+    True if the request failed before it was sent: the connection was refused, its host not resolved or connecting
+    timed out. A connection dropped after sending, e.g. a reused keep-alive connection closed by the backend, is not.
+    """
+    if isinstance(exception, requests.exceptions.ConnectTimeout):
+        return True
+    # requests wraps the urllib3 MaxRetryError whose reason is the error of opening the connection
+    reason = getattr(exception.args[0], "reason", None) if exception.args else None
+    return isinstance(reason, urllib3.exceptions.NewConnectionError)
 
-    return resp
+
+def upload_chunk(session, url, collectors, body, stats, retries, timeout):
+    """
+    Posts one chunk and retries it with backoff while the backend is unreachable or fails without having written it.
+    Read timeouts, dropped connections, gateway timeouts and other failures after the request was sent are not retried
+    since the backend may still commit the chunk, which would duplicate its collectors.
+    """
+    started = time.perf_counter()
+    error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff_seconds(attempt - 1))
+        try:
+            response = session.post(url, data=body, timeout=timeout)
+        except requests.exceptions.RequestException as exception:
+            error = exception
+            if is_connect_failure(exception):
+                continue
+            break
+        if response.ok:
+            stats.record(collectors, len(body), time.perf_counter() - started, attempt, True)
+            return
+        error = f"status <{response.status_code}>: {response.text[:200]}"
+        if response.status_code not in RETRY_STATUS_CODES:
+            break
+    stats.record(collectors, len(body), time.perf_counter() - started, attempt, False)
+    print(f"chunk of {collectors} collectors failed after {attempt + 1} attempts: {error}", file=sys.stderr)
 
 
 def translate_tags(tag_name):
@@ -83,51 +176,198 @@ def select_random_options():
         return 3
 
 
-def import_valobat():
-    from pathlib import Path
+def iter_geojson_features(file, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yields the features of a GeoJSON FeatureCollection one at a time. The file is read in chunks and every feature is
+    decoded as soon as it is complete, such that memory is bounded by the chunk and feature size, not the file size.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def read_more():
+        nonlocal buffer, position, eof
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        # drop what was already decoded before growing the buffer
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    while True:
+        match = FEATURES_ARRAY_START.search(buffer, position)
+        if match:
+            position = match.end()
+            break
+        if eof:
+            raise ValueError("not a GeoJSON FeatureCollection, features array not found")
+        # keep a possibly split '"features" : [' at the end of the buffer
+        position = max(position, len(buffer) - 64)
+        read_more()
+
+    while True:
+        while position < len(buffer) and buffer[position] in FEATURE_SEPARATORS:
+            position += 1
+        if position == len(buffer):
+            if eof:
+                raise ValueError("unexpected end of GeoJSON file in features array")
+            read_more()
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            feature, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            read_more()
+            continue
+        yield feature
 
-    for page in range(1, 15):
+
+def iter_valobat_features(pages):
+    for page in pages:
         path = Path(__file__).parent / f"./collectors/valobat-{page}.json"
         with path.open() as f:
-            data = json.load(f)
-
-        collectors_create = []
-        for feature in data["features"]:
-            properties = feature["properties"]
-            geometry = feature["geometry"]
-            phone_number = properties["contact"].get("phone")
-
-            waste_code_types = [
-                unified_type["type_label"] for unified_type in random_choices(WasteCodeType, select_random_options())
-            ]
-            authorized_vehicle_types = [
-                unified_type["type_label"]
-                for unified_type in random_choices(AuthorizedVehicleType, select_random_options())
-            ]
-            circular_strategy_types = [
-                unified_type["type_label"]
-                for unified_type in random_choices(CircularStrategyType, select_random_options())
-            ]
-
-            collector = CollectorCreate(
-                name=properties["name"],
-                address=", ".join(properties["address"]["lines"]),
-                zip_code=properties["address"]["zipcode"],
-                city=properties["address"]["city"],
-                latitude=geometry["coordinates"][1],
-                longitude=geometry["coordinates"][0],
-                phone=format_phone_number_corrected(phone_number) if phone_number else None,
-                material_types=[translate_tags(tag) for tag in properties["tags"]],
-                waste_code_types=waste_code_types,
-                authorized_vehicle_types=authorized_vehicle_types,
-                circular_strategy_types=circular_strategy_types,
-            )
-            collectors_create.append(collector)
-
-        payload = [json.loads(collector_create.json()) for collector_create in collectors_create]
-        response = request_backend("POST", "/api/collectors/", data=payload, timeout=300)
-        print(response.status_code)
+            yield from iter_geojson_features(f)
+
+
+def to_collector(feature):
+    """
+    Returns the CollectorCreate payload of a Valobat feature as plain data, ready to be serialized with its chunk.
+    """
+    properties = feature["properties"]
+    geometry = feature["geometry"]
+    phone_number = properties["contact"].get("phone")
+
+    waste_code_types = [
+        unified_type["type_label"] for unified_type in random_choices(WasteCodeType, select_random_options())
+    ]
+    authorized_vehicle_types = [
+        unified_type["type_label"] for unified_type in random_choices(AuthorizedVehicleType, select_random_options())
+    ]
+    circular_strategy_types = [
+        unified_type["type_label"] for unified_type in random_choices(CircularStrategyType, select_random_options())
+    ]
+
+    return {
+        "name": properties["name"],
+        "address": ", ".join(properties["address"]["lines"]),
+        "zip_code": properties["address"]["zipcode"],
+        "city": properties["address"]["city"],
+        "latitude": float(geometry["coordinates"][1]),
+        "longitude": float(geometry["coordinates"][0]),
+        "email": None,
+        "phone": format_phone_number_corrected(phone_number) if phone_number else None,
+        "material_types": [translate_tags(tag) for tag in properties["tags"]],
+        "waste_code_types": waste_code_types,
+        "authorized_vehicle_types": authorized_vehicle_types,
+        "circular_strategy_types": circular_strategy_types,
+    }
+
+
+def parse_valobat_collectors(pages):
+    """
+    Yields the CollectorCreate payloads of the collectors of the given Valobat dump pages, streaming each dump.
+    """
+    for feature in iter_valobat_features(pages):
+        yield to_collector(feature)
+
+
+def iter_chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_valobat(
+    backend_url,
+    pages=VALOBAT_PAGES,
+    batch_size=BATCH_SIZE,
+    concurrency=CONCURRENCY,
+    retries=RETRIES,
+    timeout=TIMEOUT,
+):
+    """
+    Uploads the Valobat collectors to the backend and returns the upload stats.
+
+    Parsing runs in the calling thread while up to concurrency chunks are posted by worker threads over a shared
+    connection pool. At most 2 * concurrency chunks are parsed and not yet uploaded such that memory stays bounded.
+    """
+    stats = UploadStats()
+    session = create_http_session(concurrency)
+    url = f"{backend_url}/api/collectors/"
+    slots = threading.BoundedSemaphore(2 * concurrency)
+
+    def upload(collectors, body):
+        try:
+            upload_chunk(session, url, collectors, body, stats, retries, timeout)
+        finally:
+            slots.release()
+
+    futures = []
+    with session, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for chunk in iter_chunks(parse_valobat_collectors(pages), batch_size):
+            body = json.dumps(chunk).encode()
+            slots.acquire()
+            futures.append(executor.submit(upload, len(chunk), body))
+    # re-raises unexpected errors of the workers instead of dropping their chunks silently
+    for future in futures:
+        future.result()
+    return stats
+
+
+def import_valobat_direct(pages=VALOBAT_PAGES):
+    """
+    Writes the Valobat collectors straight to the database of POSTGRES_CONNECTION_STRING, see crawler.direct.
+    """
+    # the backend's database modules are only needed, and configured, for direct imports
+    from app.utils.database import engine
+    from crawler.direct import ingest_collectors
+
+    return ingest_collectors(engine, parse_valobat_collectors(pages))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Imports the Valobat collectors into the Rondas backend.")
+    parser.add_argument(
+        "--backend-url",
+        default=os.getenv("NEXT_PUBLIC_BACKEND_URL"),
+        help="backend to upload to, e.g. a local stand-in, defaults to NEXT_PUBLIC_BACKEND_URL",
+    )
+    parser.add_argument("--pages", type=int, nargs="+", default=VALOBAT_PAGES, help="Valobat dump pages to import")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="collectors per request")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="requests in flight at the same time")
+    parser.add_argument("--retries", type=int, default=RETRIES, help="retries of a failed request")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="timeout of a request in seconds")
+    parser.add_argument(
+        "--direct",
+        action="store_true",
+        help="write to the database of POSTGRES_CONNECTION_STRING instead of uploading to the backend",
+    )
+    args = parser.parse_args()
+    if not args.direct and not args.backend_url:
+        parser.error("--backend-url or NEXT_PUBLIC_BACKEND_URL is required")
+    return args
 
 
 if __name__ == "__main__":
-    import_valobat()
+    args = parse_args()
+    if args.direct:
+        print(import_valobat_direct(pages=args.pages))
+        sys.exit(0)
+    stats = import_valobat(
+        args.backend_url.rstrip("/"),
+        pages=args.pages,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        retries=args.retries,
+        timeout=args.timeout,
+    )
+    print(stats.summary())
+    sys.exit(1 if stats.failed_chunks else 0)
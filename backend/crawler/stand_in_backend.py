@@ -0,0 +1,95 @@
+import argparse
+import json
+import random
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = 8081
+LATENCY_SECONDS = 0.2
+FAILURE_RATE = 0.0
+
+
+class StandInStats:
+    """
+    Counts what the stand-in received, in particular the connections and the requests in flight at the same time to
+    check the connection reuse and the concurrency of the crawler.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.failed_requests = 0
+        self.collectors = 0
+
+    def summary(self):
+        return (
+            f"{self.requests} requests over {len(self.connections)} connections, "
+            f"{self.max_in_flight} in flight at most, "
+            f"{self.failed_requests} failed on purpose, {self.collectors} collectors received"
+        )
+
+
+def create_handler(stats, latency_seconds, failure_rate):
+    class StandInHandler(BaseHTTPRequestHandler):
+        # keeps the connections alive like the backend
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            with stats.lock:
+                stats.connections.add(self.client_address)
+                stats.requests += 1
+                stats.in_flight += 1
+                stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            time.sleep(latency_seconds)
+            failed = random.random() < failure_rate
+            with stats.lock:
+                stats.in_flight -= 1
+                if failed:
+                    stats.failed_requests += 1
+                else:
+                    stats.collectors += len(json.loads(body))
+            # 503 is retried by the crawler, the chunk was not written
+            status_code, content = (503, b'{"detail":"unavailable"}') if failed else (200, b"[]")
+            self.send_response(status_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+    return StandInHandler
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Accepts the crawler uploads on POST /api/collectors/ without a database, to measure the crawler."
+    )
+    parser.add_argument("--port", type=int, default=PORT, help="port to listen on")
+    parser.add_argument("--latency", type=float, default=LATENCY_SECONDS, help="seconds to answer a request")
+    parser.add_argument("--failure-rate", type=float, default=FAILURE_RATE, help="share of requests answered with 503")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    stats = StandInStats()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), create_handler(stats, args.latency, args.failure_rate))
+    # prints the summary when stopped from another terminal as well
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"listening on http://127.0.0.1:{args.port}, stop with Ctrl+C", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(stats.summary())
@@ -0,0 +1,51 @@
+"""trigram search indexes
+
+Revision ID: 70909a69507b
+Revises: 3cfa163547fa
+Create Date: 2026-10-18 12:30:12.481933
+
+"""
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "70909a69507b"
+down_revision = "3cfa163547fa"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # required for gin_trgm_ops, lets ILIKE '%text%' use an index instead of a sequential scan
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_building_element_title_trgm",
+        "building_element",
+        ["title"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_collector_name_trgm",
+        "collector",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_contractor_name_trgm",
+        "contractor",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_contractor_name_trgm", table_name="contractor")
+    op.drop_index("ix_collector_name_trgm", table_name="collector")
+    op.drop_index("ix_building_element_title_trgm", table_name="building_element")
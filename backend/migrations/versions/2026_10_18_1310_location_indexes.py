@@ -0,0 +1,33 @@
+"""location indexes
+
+Revision ID: 5c2e81d4f0a3
+Revises: 70909a69507b
+Create Date: 2026-10-18 13:10:47.102394
+
+"""
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5c2e81d4f0a3"
+down_revision = "70909a69507b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_building_element_upload_latitude_longitude",
+        "building_element_upload",
+        ["latitude", "longitude"],
+        unique=False,
+    )
+    op.create_index("ix_collector_latitude_longitude", "collector", ["latitude", "longitude"], unique=False)
+    op.create_index("ix_contractor_latitude_longitude", "contractor", ["latitude", "longitude"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_contractor_latitude_longitude", table_name="contractor")
+    op.drop_index("ix_collector_latitude_longitude", table_name="collector")
+    op.drop_index("ix_building_element_upload_latitude_longitude", table_name="building_element_upload")
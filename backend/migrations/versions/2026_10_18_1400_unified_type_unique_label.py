@@ -0,0 +1,26 @@
+"""unified type unique label
+
+Revision ID: 9b41d7c2e6f8
+Revises: 5c2e81d4f0a3
+Create Date: 2026-10-18 14:00:12.518027
+
+"""
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9b41d7c2e6f8"
+down_revision = "5c2e81d4f0a3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_unique_constraint(
+        "uq_unified_type_discriminator_type_label", "unified_type", ["discriminator", "type_label"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_unified_type_discriminator_type_label", "unified_type", type_="unique")
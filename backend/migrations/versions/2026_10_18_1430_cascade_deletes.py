@@ -0,0 +1,43 @@
+"""cascade deletes
+
+Revision ID: e3a8f05c91b2
+Revises: 9b41d7c2e6f8
+Create Date: 2026-10-18 14:30:41.733960
+
+"""
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e3a8f05c91b2"
+down_revision = "9b41d7c2e6f8"
+branch_labels = None
+depends_on = None
+
+# (table, column, referred table) of the foreign keys whose rows are deleted together with the referred row
+CASCADE_FOREIGN_KEYS = [
+    ("building_element", "building_element_upload_id", "building_element_upload"),
+    ("collector_to_material_type", "collector_id", "collector"),
+    ("collector_to_waste_code_type", "collector_id", "collector"),
+    ("collector_to_authorized_vehicle_type", "collector_id", "collector"),
+    ("collector_to_circular_strategy_type", "collector_id", "collector"),
+    ("contractor_to_material_type", "contractor_id", "contractor"),
+    ("contractor_to_waste_code_type", "contractor_id", "contractor"),
+    ("contractor_to_circular_service_type", "contractor_id", "contractor"),
+]
+
+
+def _recreate_foreign_keys(ondelete):
+    for table, column, referred_table in CASCADE_FOREIGN_KEYS:
+        name = f"{table}_{column}_fkey"
+        op.drop_constraint(name, table, type_="foreignkey")
+        op.create_foreign_key(name, table, referred_table, [column], ["id"], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    _recreate_foreign_keys("CASCADE")
+
+
+def downgrade() -> None:
+    _recreate_foreign_keys(None)
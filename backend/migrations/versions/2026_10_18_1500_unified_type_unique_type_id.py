@@ -0,0 +1,24 @@
+"""unified type unique type id
+
+Revision ID: 4f6c2a9d8e15
+Revises: e3a8f05c91b2
+Create Date: 2026-10-18 15:00:27.904612
+
+"""
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4f6c2a9d8e15"
+down_revision = "e3a8f05c91b2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_unique_constraint("uq_unified_type_discriminator_type_id", "unified_type", ["discriminator", "type_id"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_unified_type_discriminator_type_id", "unified_type", type_="unique")
@@ -0,0 +1,30 @@
+"""building element upload id index
+
+Revision ID: a71d3e5b0c94
+Revises: 4f6c2a9d8e15
+Create Date: 2026-10-18 15:30:12.518307
+
+"""
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a71d3e5b0c94"
+down_revision = "4f6c2a9d8e15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # without it every cascaded delete of an upload scans building_element
+    op.create_index(
+        "ix_building_element_building_element_upload_id",
+        "building_element",
+        ["building_element_upload_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_building_element_building_element_upload_id", table_name="building_element")
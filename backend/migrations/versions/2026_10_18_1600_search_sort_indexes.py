@@ -0,0 +1,34 @@
+"""search sort indexes
+
+Revision ID: c5f82b9e1d07
+Revises: a71d3e5b0c94
+Create Date: 2026-10-18 16:00:41.273865
+
+"""
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c5f82b9e1d07"
+down_revision = "a71d3e5b0c94"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # the searches order by these columns and seek past the cursor, the trigram indexes cannot serve the order
+    op.create_index("ix_collector_name_id", "collector", ["name", "id"], unique=False)
+    op.create_index("ix_contractor_name_id", "contractor", ["name", "id"], unique=False)
+    op.create_index(
+        "ix_building_element_building_element_upload_id_id",
+        "building_element",
+        ["building_element_upload_id", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_building_element_building_element_upload_id_id", table_name="building_element")
+    op.drop_index("ix_contractor_name_id", table_name="contractor")
+    op.drop_index("ix_collector_name_id", table_name="collector")
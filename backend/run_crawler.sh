@@ -18,4 +18,4 @@ source .env
 export PYTHONDONTWRITEBYTECODE=1
 
 # run backend
-.venv/bin/python3 -m crawler.main
\ No newline at end of file
+.venv/bin/python3 -m crawler.main "$@"
\ No newline at end of file
@@ -0,0 +1,88 @@
+import os
+import tempfile
+
+# the app reads its settings on import, the tests run against a throwaway SQLite database
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "rondas.sqlite")
+os.environ.update(
+    FRONTEND_URL="http://localhost:3000",
+    POSTGRES_CONNECTION_STRING=f"sqlite:///{DATABASE_PATH}",
+    ASYNC_POSTGRES_CONNECTION_STRING=f"sqlite+aiosqlite:///{DATABASE_PATH}",
+    DB_POOL_MODE="null",
+)
+
+import pytest  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.unified_type_model import UnifiedType  # noqa: E402
+from app.types import get_unified_types  # noqa: E402
+from app.utils.database import async_engine, engine  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, select  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+
+class StatementCounter:
+    """
+    Counts the statements sent to the database while active.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.active = False
+
+    def __call__(self, *args):
+        if self.active:
+            self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        self.active = True
+        return self
+
+    def __exit__(self, *args):
+        self.active = False
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(UnifiedType.__table__.insert(), get_unified_types())
+    yield
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def empty_tables():
+    yield
+    with engine.begin() as connection:
+        for table in reversed(SQLModel.metadata.sorted_tables):
+            if table is not UnifiedType.__table__:
+                connection.execute(table.delete())
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def type_ids():
+    """
+    Returns the unified_type id of a type class and label.
+    """
+    with engine.connect() as connection:
+        rows = connection.execute(select(UnifiedType.id, UnifiedType.discriminator, UnifiedType.type_label)).all()
+    ids = {(discriminator, type_label): id for id, discriminator, type_label in rows}
+    return lambda type_class, type_label: ids[(type_class.DISCRIMINATOR, type_label)]
+
+
+@pytest.fixture
+def statements():
+    # the search endpoints run on the async engine, or on the sync one with DB_SEARCH_SESSIONS=sync
+    counter = StatementCounter()
+    for counted_engine in [engine, async_engine.sync_engine]:
+        event.listen(counted_engine, "before_cursor_execute", counter)
+    yield counter
+    for counted_engine in [engine, async_engine.sync_engine]:
+        event.remove(counted_engine, "before_cursor_execute", counter)
@@ -0,0 +1,74 @@
+import pytest
+from app.models.building_element_model import BuildingElement, BuildingElementUpload
+from app.types import (
+    BuildingElementUnitType,
+    BuildingElementWorksheetType,
+    HealthStatusType,
+    MaterialType,
+)
+from app.utils.database import engine
+
+FILTER = {
+    "worksheet_type_ids": [],
+    "unit_type_ids": [],
+    "material_type_ids": [],
+    "health_status_type_ids": [],
+    "reuse_potential_type_ids": [],
+    "waste_code_type_ids": [],
+    "recycling_potential_type_ids": [],
+    "circular_service_needed_type_ids": [],
+}
+
+
+def insert_building_elements(type_ids, count):
+    # spread over two uploads such that the uploads of the page are assembled as well
+    with engine.begin() as connection:
+        for id in (1, 2):
+            connection.execute(
+                BuildingElementUpload.__table__.insert(),
+                {"id": id, "address": "1 Rue de Rivoli, Paris", "latitude": 48.86, "longitude": 2.35},
+            )
+        connection.execute(
+            BuildingElement.__table__.insert(),
+            [
+                {
+                    "building_element_upload_id": 1 + id % 2,
+                    "worksheet_type_id": type_ids(BuildingElementWorksheetType, "STRUCTURE"),
+                    "category": "Walls",
+                    "reference": f"R{id}",
+                    "title": f"Beam {id:03}",
+                    "unit_type_id": type_ids(BuildingElementUnitType, "ml"),
+                    "material_type_id": type_ids(MaterialType, "Wood"),
+                    "health_status_type_id": type_ids(HealthStatusType, "Lead"),
+                }
+                for id in range(count)
+            ],
+        )
+
+
+def search(client):
+    response = client.post("/api/building-elements/search/", json={"query": {"text": ""}, "filter": FILTER})
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+@pytest.mark.parametrize("count", [2, 42])
+def test_search_runs_one_statement_whatever_the_number_of_results(client, type_ids, statements, count):
+    insert_building_elements(type_ids, count)
+    # loads the unified type registry
+    search(client)
+
+    with statements:
+        uploads = search(client)
+
+    # the page joined with its uploads, the type labels are read from the registry
+    assert statements.count == 1
+    building_elements = [building_element for upload in uploads for building_element in upload["building_elements"]]
+    assert len(uploads) == 2
+    assert len(building_elements) == count
+    for building_element in building_elements:
+        assert building_element["worksheet_type"] == "STRUCTURE"
+        assert building_element["unit_type"] == "ml"
+        assert building_element["material_type"] == "Wood"
+        assert building_element["health_status_type"] == "Lead"
+        assert building_element["waste_code_type"] is None
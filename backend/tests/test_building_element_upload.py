@@ -0,0 +1,73 @@
+import json
+
+from app.models.building_element_model import BuildingElement, BuildingElementUpload
+from app.utils.database import engine
+from sqlalchemy import func, select
+
+HEADER = "worksheet_type;category;reference;title;unit_type;total;total_mass_kg;total_volume_m3\n"
+LOCATION = {"address": "1 Rue de Rivoli, Paris", "latitude": "48.86", "longitude": "2.35"}
+
+
+def upload_csv(client, content):
+    return client.post(
+        "/api/building-elements/upload/",
+        files={"file": ("inventory.csv", content.encode(), "text/csv")},
+        data=LOCATION,
+    )
+
+
+def events(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def count_rows(model):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(model)).scalar_one()
+
+
+def test_decimal_commas_of_semicolon_delimited_files_are_numbers(client):
+    response = upload_csv(
+        client,
+        HEADER + "STRUCTURE;Walls;R1;Beam;ml;1,5;1234,56;0,25\nSTRUCTURE;Walls;R2;Door;U;3;12.5;-1,0\n",
+    )
+
+    assert response.status_code == 201
+    *_, done = events(response)
+    assert done["inserted"] == 2
+    assert done["failed"] == 0
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(BuildingElement.total, BuildingElement.total_mass_kg, BuildingElement.total_volume_m3).order_by(
+                BuildingElement.reference
+            )
+        ).all()
+    assert [tuple(row) for row in rows] == [(1.5, 1234.56, 0.25), (3, 12.5, -1)]
+
+
+def test_file_without_valid_rows_is_rejected_without_an_upload(client):
+    response = upload_csv(client, HEADER + "STRUCTURE;Walls;R1;Beam;unknown;1;1;1\nUNKNOWN;Walls;R2;Door;U;1;1;1\n")
+
+    assert response.status_code == 400
+    assert len(response.json()["detail"]) == 2
+    assert all(error.startswith("row <") for error in response.json()["detail"])
+    assert count_rows(BuildingElementUpload) == 0
+
+
+def test_file_without_rows_is_rejected(client):
+    response = upload_csv(client, HEADER)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "No building elements found in file"
+
+
+def test_errors_before_the_first_valid_row_are_streamed(client):
+    response = upload_csv(client, HEADER + "STRUCTURE;Walls;R1;Beam;unknown;1;1;1\nSTRUCTURE;Walls;R2;Door;U;1;1;1\n")
+
+    assert response.status_code == 201
+    error, done = events(response)
+    assert error["event"] == "error"
+    assert error["location"] == "row <2>"
+    assert done["event"] == "done"
+    assert done["building_element_upload_id"] is not None
+    assert (done["processed"], done["inserted"], done["failed"]) == (2, 1, 1)
+    assert count_rows(BuildingElement) == 1
@@ -0,0 +1,43 @@
+import pytest
+from app.utils.pagination import encode_cursor
+
+COLLECTOR_FILTER = {
+    "material_type_ids": [],
+    "waste_code_type_ids": [],
+    "authorized_vehicle_type_ids": [],
+    "circular_strategy_type_ids": [],
+}
+
+
+def search_collectors(client, cursor):
+    return client.post(
+        "/api/collectors/search",
+        json={"query": {"text": ""}, "filter": COLLECTOR_FILTER, "pagination": {"limit": 10, "cursor": cursor}},
+    )
+
+
+def test_cursor_of_the_sort_column_types_is_accepted(client):
+    response = search_collectors(client, encode_cursor(["Partner 001", 1]))
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64",
+        encode_cursor({"name": "Partner 001", "id": 1}),
+        encode_cursor(["Partner 001"]),
+        # (name, id) with values of the wrong type or out of the range of the column
+        encode_cursor([1, 1]),
+        encode_cursor(["Partner 001", "1"]),
+        encode_cursor(["Partner 001", 1.5]),
+        encode_cursor(["Partner 001", True]),
+        encode_cursor(["Partner 001", None]),
+        encode_cursor(["Partner 001", 2**31]),
+        encode_cursor(["Partner\x00001", 1]),
+    ],
+)
+def test_invalid_cursor_is_rejected(client, cursor):
+    response = search_collectors(client, cursor)
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"Invalid cursor <{cursor}>"
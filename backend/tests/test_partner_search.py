@@ -0,0 +1,80 @@
+import pytest
+from app.api.collectors import COLLECTOR_TYPE_LINKS
+from app.api.contractors import CONTRACTOR_TYPE_LINKS
+from app.models.collector_model import Collector
+from app.models.contractor_model import Contractor
+from app.utils.database import engine
+
+# (route, model, foreign key of the link tables, type collections, labels linked to every partner)
+PARTNERS = {
+    "collectors": (
+        Collector,
+        "collector_id",
+        COLLECTOR_TYPE_LINKS,
+        {
+            "material_types": ["Wood", "Concrete"],
+            "waste_code_types": ["17 01 01"],
+            "authorized_vehicle_types": [],
+            "circular_strategy_types": ["Reuse", "Recycling"],
+        },
+    ),
+    "contractors": (
+        Contractor,
+        "contractor_id",
+        CONTRACTOR_TYPE_LINKS,
+        {
+            "material_types": ["Wood"],
+            "waste_code_types": ["17 01 01", "17 01 02"],
+            "circular_service_types": ["Demolition"],
+        },
+    ),
+}
+
+
+def insert_partners(type_ids, model, foreign_key_name, type_links, labels, count):
+    with engine.begin() as connection:
+        for id in range(1, count + 1):
+            connection.execute(
+                model.__table__.insert(),
+                {
+                    "id": id,
+                    "name": f"Partner {id:03}",
+                    "address": "1 Rue de Rivoli",
+                    "zip_code": "75001",
+                    "city": "Paris",
+                    "latitude": 48.86,
+                    "longitude": 2.35,
+                },
+            )
+            for attribute, (link_model, type_class) in type_links.items():
+                for type_label in labels[attribute]:
+                    connection.execute(
+                        link_model.__table__.insert(),
+                        {foreign_key_name: id, "unified_type_id": type_ids(type_class, type_label)},
+                    )
+
+
+def search(client, route, type_links):
+    filter = {f"{attribute[:-1]}_ids": [] for attribute in type_links}
+    response = client.post(f"/api/{route}/search", json={"query": {"text": ""}, "filter": filter})
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+@pytest.mark.parametrize("route", PARTNERS)
+@pytest.mark.parametrize("count", [2, 42])
+def test_search_runs_two_statements_whatever_the_number_of_results(client, type_ids, statements, route, count):
+    model, foreign_key_name, type_links, labels = PARTNERS[route]
+    insert_partners(type_ids, model, foreign_key_name, type_links, labels, count)
+    # loads the unified type registry
+    search(client, route, type_links)
+
+    with statements:
+        results = search(client, route, type_links)
+
+    # the page and the type links of all its partners
+    assert statements.count == 2
+    assert len(results) == count
+    for result in results:
+        for attribute in type_links:
+            assert sorted(result[attribute]) == sorted(labels[attribute])
@@ -0,0 +1,70 @@
+import pytest
+from app.models.unified_type_model import UnifiedType
+from app.types import MaterialType
+from app.utils.database import SessionLocal, UnifiedTypeRegistry, engine
+from sqlalchemy import delete, func, select
+
+
+@pytest.fixture
+def session():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def create_elsewhere():
+    """
+    Returns a function inserting a material type behind the back of the registries, as another worker would.
+    """
+    labels = []
+
+    def create(label):
+        with engine.begin() as connection:
+            type_id = connection.execute(
+                select(func.max(UnifiedType.type_id)).where(UnifiedType.discriminator == MaterialType.DISCRIMINATOR)
+            ).scalar_one()
+            connection.execute(
+                UnifiedType.__table__.insert(),
+                {"discriminator": MaterialType.DISCRIMINATOR, "type_id": type_id + 1, "type_label": label},
+            )
+        labels.append(label)
+
+    yield create
+    with engine.begin() as connection:
+        connection.execute(delete(UnifiedType).where(UnifiedType.type_label.in_(labels)))
+
+
+def test_every_lookup_is_counted(session):
+    registry = UnifiedTypeRegistry()
+
+    registry.get_labels(session)
+    registry.get_all(session, MaterialType.DISCRIMINATOR)
+    registry.get_by_value(session, MaterialType.DISCRIMINATOR, "Wood")
+
+    assert (registry.hits, registry.misses) == (2, 1)
+
+
+def test_type_created_elsewhere_is_found_after_a_reload(session, create_elsewhere):
+    registry = UnifiedTypeRegistry()
+    registry.load(session)
+    create_elsewhere("Created elsewhere")
+
+    assert registry.get_by_value(session, MaterialType.DISCRIMINATOR, "Created elsewhere") is not None
+    assert (registry.reloads, registry.unknown) == (1, 0)
+
+
+def test_labels_of_types_created_elsewhere_are_reloaded(session, create_elsewhere):
+    registry = UnifiedTypeRegistry()
+    registry.load(session)
+    create_elsewhere("Created elsewhere")
+    id = session.execute(select(UnifiedType.id).where(UnifiedType.type_label == "Created elsewhere")).scalar_one()
+
+    assert registry.get_labels(session, [id])[id] == "Created elsewhere"
+
+
+def test_unknown_labels_reload_at_most_once_per_interval(session):
+    registry = UnifiedTypeRegistry()
+
+    assert registry.get_by_value(session, MaterialType.DISCRIMINATOR, "Unknown") is None
+    assert registry.get_by_value(session, MaterialType.DISCRIMINATOR, "Unknown") is None
+    assert (registry.reloads, registry.unknown) == (1, 2)
@@ -22,6 +22,22 @@ export const createBuildingElementUpload = async (
   return data;
 };
 
+export const deleteBuildingElementUpload = async (
+  buildingElementUploadId: number
+) => {
+  const { response, data } = await fetchApi(
+    API_ROUTE,
+    `/${buildingElementUploadId}`,
+    {
+      method: "DELETE",
+    }
+  );
+  if (!response.ok)
+    throw new ApiError("deleteBuildingElementUpload failed", data);
+  // console.log("deleteBuildingElementUpload response", data);
+  return data;
+};
+
 export const deleteAllBuildingElements = async () => {
   const { response, data } = await fetchApi(API_ROUTE, `/`, {
     method: "DELETE",
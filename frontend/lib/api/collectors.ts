@@ -3,6 +3,7 @@ import {
   CollectorFilterOptions,
   CollectorRead,
   CollectorSearchRequest,
+  CollectorUpdate,
 } from "@/types/api/collector";
 import { ApiError, fetchApi } from "../utils";
 import { SearchResponse } from "@/types/api/search";
@@ -34,6 +35,19 @@ export const updateCollector = async (
   return data;
 };
 
+export const patchCollector = async (
+  collectorId: number,
+  collector: CollectorUpdate
+): Promise<CollectorRead> => {
+  const { response, data } = await fetchApi(API_ROUTE, `/${collectorId}`, {
+    method: "PATCH",
+    body: collector,
+  });
+  if (!response.ok) throw new ApiError("patchCollector failed", data);
+  // console.log("patchCollector Response", data);
+  return data;
+};
+
 export const deleteCollector = async (
   collectorId: number
 ): Promise<CollectorRead> => {
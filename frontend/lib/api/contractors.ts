@@ -3,6 +3,7 @@ import {
   ContractorFilterOptions,
   ContractorRead,
   ContractorSearchRequest,
+  ContractorUpdate,
 } from "@/types/api/contractor";
 import { ApiError, fetchApi } from "../utils";
 import { SearchResponse } from "@/types/api/search";
@@ -34,6 +35,19 @@ export const updateContractor = async (
   return data;
 };
 
+export const patchContractor = async (
+  contractorId: number,
+  contractor: ContractorUpdate
+): Promise<ContractorRead> => {
+  const { response, data } = await fetchApi(API_ROUTE, `/${contractorId}`, {
+    method: "PATCH",
+    body: contractor,
+  });
+  if (!response.ok) throw new ApiError("patchContractor failed", data);
+  // console.log("patchContractor Response", data);
+  return data;
+};
+
 export const deleteContractor = async (
   contractorId: number
 ): Promise<ContractorRead> => {
@@ -1,54 +1,51 @@
-import { CollectorRead, CollectorSearchRequest } from "@/types/api/collector";
+import { CollectorRead } from "@/types/api/collector";
+import { ContractorRead } from "@/types/api/contractor";
 import {
-  ContractorRead,
-  ContractorSearchRequest,
-} from "@/types/api/contractor";
-import {
-  BuildingElementSearchRequest,
   BuildingElementUploadRead,
   MatchesSearchRequest,
 } from "@/types/api/building-element";
-import { SearchResponse } from "@/types/api/search";
-import { buildingElementUploadsFetcher } from "./building-elements";
-import { collectorsFetcher } from "./collectors";
-import { contractorsFetcher } from "./contractors";
+import { Facets, SearchResponse } from "@/types/api/search";
+import { ApiError, fetchApi } from "../utils";
+
+const API_ROUTE = "/api/matches";
+
+export type UploadCompatibility = {
+  building_element_upload_id: number;
+  collector_ids: number[];
+  contractor_ids: number[];
+};
 
 export type MatchesRead = {
   building_element_uploads: BuildingElementUploadRead[];
   collectors: CollectorRead[];
   contractors: ContractorRead[];
+  compatibilities?: UploadCompatibility[];
+  next_cursors: {
+    building_element?: string;
+    collector?: string;
+    contractor?: string;
+  };
+  totals: {
+    building_element?: number;
+    collector?: number;
+    contractor?: number;
+  };
+  facets?: {
+    building_element: Facets;
+    collector: Facets;
+    contractor: Facets;
+  };
 };
 
 export const matchesFetcher = async (
   searchRequest: MatchesSearchRequest
 ): Promise<SearchResponse<MatchesRead>> => {
-  const buildingElementSearchRequest: BuildingElementSearchRequest = {
-    query: searchRequest.query,
-    filter: searchRequest.filter.building_element,
-  };
-  const buildingElementUploads = await buildingElementUploadsFetcher(
-    buildingElementSearchRequest
-  );
-
-  const collectorSearchRequest: CollectorSearchRequest = {
-    query: searchRequest.query,
-    filter: searchRequest.filter.collector,
-  };
-  const collectors = await collectorsFetcher(collectorSearchRequest);
-
-  const contractorSearchRequest: ContractorSearchRequest = {
-    query: searchRequest.query,
-    filter: searchRequest.filter.contractor,
-  };
-  const contractors = await contractorsFetcher(contractorSearchRequest);
-
-  return {
-    results: [
-      {
-        building_element_uploads: buildingElementUploads.results,
-        collectors: collectors.results,
-        contractors: contractors.results,
-      },
-    ],
-  };
+  if (!searchRequest.query.text) searchRequest.query.text = "";
+  const { response, data } = await fetchApi(API_ROUTE, `/search/`, {
+    method: "POST",
+    body: searchRequest,
+  });
+  if (!response.ok) throw new ApiError("matchesFetcher failed", data);
+  // console.log("matchesFetcher Response", data);
+  return data;
 };
@@ -5,6 +5,7 @@
 
 import { CollectorFilter, CollectorRead } from "./collector";
 import { ContractorFilter } from "./contractor";
+import { LocationFilter, NumberRange, Pagination } from "./search";
 import { UnifiedTypeRead } from "./type";
 
 type BuildingElementUpload = {
@@ -64,6 +65,8 @@ export type BuildingElementSearchRequest = {
     text: string;
   };
   filter: BuildingElementFilter;
+  pagination?: Pagination;
+  include_facets?: boolean;
 };
 
 export type BuildingElementFilter = {
@@ -75,6 +78,9 @@ export type BuildingElementFilter = {
   waste_code_type_ids: number[];
   recycling_potential_type_ids: number[];
   circular_service_needed_type_ids: number[];
+  total_mass_kg?: NumberRange;
+  total_volume_m3?: NumberRange;
+  location?: LocationFilter;
 };
 
 export type MatchesSearchRequest = {
@@ -86,6 +92,13 @@ export type MatchesSearchRequest = {
     collector: CollectorFilter;
     contractor: ContractorFilter;
   };
+  pagination?: {
+    building_element?: Pagination;
+    collector?: Pagination;
+    contractor?: Pagination;
+  };
+  include_compatibilities?: boolean;
+  include_facets?: boolean;
 };
 
 export type BuildingElementMatchesResponse = {
@@ -3,6 +3,7 @@
 // See: ./backend/app/schemas/collector_schema.py                          //
 /////////////////////////////////////////////////////////////////////////////
 
+import { LocationFilter, Pagination } from "./search";
 import { UnifiedTypeRead } from "./type";
 
 type CollectorBase = {
@@ -27,6 +28,8 @@ export type CollectorRead = CollectorBase & {
 
 export type CollectorCreate = CollectorBase;
 
+export type CollectorUpdate = Partial<CollectorBase>;
+
 export type CollectorFilterOptions = {
   material_types: UnifiedTypeRead[];
   waste_code_types: UnifiedTypeRead[];
@@ -39,6 +42,7 @@ export type CollectorFilter = {
   waste_code_type_ids: number[];
   authorized_vehicle_type_ids: number[];
   circular_strategy_type_ids: number[];
+  location?: LocationFilter;
 };
 
 export type CollectorSearchRequest = {
@@ -46,4 +50,6 @@ export type CollectorSearchRequest = {
     text: string;
   };
   filter: CollectorFilter;
+  pagination?: Pagination;
+  include_facets?: boolean;
 };
@@ -3,6 +3,7 @@
 // See: ./backend/app/schemas/contractor_schema.py                         //
 /////////////////////////////////////////////////////////////////////////////
 
+import { LocationFilter, Pagination } from "./search";
 import { UnifiedTypeRead } from "./type";
 
 type ContractorBase = {
@@ -26,6 +27,8 @@ export type ContractorRead = ContractorBase & {
 
 export type ContractorCreate = ContractorBase;
 
+export type ContractorUpdate = Partial<ContractorBase>;
+
 export type ContractorFilterOptions = {
   material_types: UnifiedTypeRead[];
   waste_code_types: UnifiedTypeRead[];
@@ -36,6 +39,7 @@ export type ContractorFilter = {
   material_type_ids: number[];
   waste_code_type_ids: number[];
   circular_service_type_ids: number[];
+  location?: LocationFilter;
 };
 
 export type ContractorSearchRequest = {
@@ -43,4 +47,6 @@ export type ContractorSearchRequest = {
     text: string;
   };
   filter: ContractorFilter;
+  pagination?: Pagination;
+  include_facets?: boolean;
 };
@@ -5,9 +5,44 @@
 
 export interface SearchResponse<T> {
   results: T[];
+  next_cursor?: string;
+  total?: number;
+  facets?: Facets;
 }
 
+// filter option key -> unified type id -> number of matching results
+export type Facets = Record<string, Record<number, number>>;
+
+export type Pagination = {
+  limit?: number;
+  cursor?: string;
+  include_total?: boolean;
+};
+
 export type SearchRequest = {
   query: any;
   filter: any;
 };
+
+export type NumberRange = {
+  min?: number;
+  max?: number;
+};
+
+export type BoundingBox = {
+  min_latitude: number;
+  min_longitude: number;
+  max_latitude: number;
+  max_longitude: number;
+};
+
+export type RadiusArea = {
+  latitude: number;
+  longitude: number;
+  radius_km: number;
+};
+
+export type LocationFilter = {
+  bounding_box?: BoundingBox;
+  radius?: RadiusArea;
+};